@@ -17,6 +17,13 @@ sys.path.insert(0, str(project_root))
 
 from src.infrastructure.services.model_sync_scheduler import ModelSyncDaemon, ModelSyncScheduler
 
+# 有uvloop（uvicorn[standard]依赖）时使用其事件循环，减少每次数据库往返的系统调用开销
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 
 def load_config(config_path: str = None) -> dict:
     """
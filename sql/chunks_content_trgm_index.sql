@@ -0,0 +1,7 @@
+-- 分块内容检索索引（pg_trgm 三元组 GIN 索引）
+-- 支持 content LIKE '%关键词%' 走索引，并提供 word_similarity 相关度
+-- 选用三元组而非 to_tsvector('simple', ...)：simple 分词按空白切分，无法检索中文句内子串
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_chunks_content_trgm ON chunks USING GIN (content gin_trgm_ops);
@@ -0,0 +1,5 @@
+-- datasets (id, user_id, is_deleted) 复合索引
+-- embedding配置按 (id, user_id) 行值 IN 批量查询并过滤 is_deleted，
+-- 三列都在索引中，归属与软删除校验可以只走索引完成
+
+CREATE INDEX IF NOT EXISTS idx_datasets_id_user_deleted ON datasets (id, user_id, is_deleted);
@@ -0,0 +1,17 @@
+-- 向量相似度搜索的半精度表达式索引（HNSW，需要PGVector 0.7.0+）
+-- embedding_data 仍以 vector(1024) 全精度存储，索引按 halfvec(1024) 构建，索引体积与图遍历带宽减半
+-- 检索时先走该索引取候选，再按全精度向量精排，召回损失可忽略
+-- 执行后设置环境变量 EMBEDDING_INDEX_TYPE=halfvec_hnsw
+
+-- 加大构建内存可显著缩短建索引时间（仅对当前会话生效）
+SET maintenance_work_mem = '1GB';
+
+-- 表达式需与查询中的 ORDER BY 表达式保持一致
+CREATE INDEX IF NOT EXISTS idx_embeddings_vector_halfvec_expr_hnsw ON embeddings
+    USING hnsw ((embedding_data::halfvec(1024)) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- 半精度索引可用后移除全精度向量索引，避免重复维护
+DROP INDEX IF EXISTS idx_embeddings_vector_ivfflat;
+DROP INDEX IF EXISTS idx_embeddings_vector_hnsw;
+
+ANALYZE embeddings;
@@ -0,0 +1,20 @@
+-- 向量半精度量化迁移（需要PGVector 0.7.0+）
+-- embeddings.embedding_data 由 vector(1024) 转为 halfvec(1024)，每行向量存储减半
+-- 并增加二值量化表达式索引，用于相似度搜索的粗排候选生成（再以halfvec精排）
+-- 执行后需设置环境变量 EMBEDDING_VECTOR_TYPE=halfvec，使应用按halfvec绑定与检索
+
+-- 旧的 vector_cosine_ops 索引不适用于 halfvec 列
+DROP INDEX IF EXISTS idx_embeddings_vector_ivfflat;
+
+ALTER TABLE embeddings
+    ALTER COLUMN embedding_data TYPE halfvec(1024) USING embedding_data::halfvec(1024);
+
+-- 半精度向量的余弦距离索引
+CREATE INDEX IF NOT EXISTS idx_embeddings_vector_halfvec_hnsw ON embeddings
+    USING hnsw (embedding_data halfvec_cosine_ops);
+
+-- 二值量化（1 bit/维）汉明距离索引，表达式需与查询中的 ORDER BY 表达式保持一致
+CREATE INDEX IF NOT EXISTS idx_embeddings_vector_binary_hnsw ON embeddings
+    USING hnsw ((binary_quantize(embedding_data)::bit(1024)) bit_hamming_ops);
+
+ANALYZE embeddings;
@@ -0,0 +1,14 @@
+-- 向量相似度搜索索引（HNSW，余弦距离，需要PGVector 0.5.0+）
+-- 无需按数据量训练聚类数，召回/延迟通常优于IVFFlat，但构建耗时和内存更高
+-- 执行后设置环境变量 EMBEDDING_INDEX_TYPE=hnsw，查询时改为 SET LOCAL hnsw.ef_search 调优
+
+-- 加大构建内存可显著缩短建索引时间（仅对当前会话生效）
+SET maintenance_work_mem = '1GB';
+
+CREATE INDEX IF NOT EXISTS idx_embeddings_vector_hnsw ON embeddings
+    USING hnsw (embedding_data vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- HNSW索引可用后移除IVFFlat索引，避免重复维护
+DROP INDEX IF EXISTS idx_embeddings_vector_ivfflat;
+
+ANALYZE embeddings;
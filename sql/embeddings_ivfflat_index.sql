@@ -0,0 +1,22 @@
+-- 向量相似度搜索索引（IVFFlat，余弦距离）
+-- 依赖PGVector扩展，且 embeddings.embedding_data 已为 vector 类型
+-- 聚类数 lists 按 4 * sqrt(行数) 估算，数据量显著变化后应重建索引
+-- 查询时通过 SET LOCAL ivfflat.probes 调整召回率与延迟的平衡
+
+DO $$
+DECLARE
+    row_count BIGINT;
+    list_count INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO row_count FROM embeddings;
+    list_count := GREATEST(1, CEIL(4 * SQRT(row_count))::INTEGER);
+
+    EXECUTE format(
+        'CREATE INDEX IF NOT EXISTS idx_embeddings_vector_ivfflat ON embeddings '
+        'USING ivfflat (embedding_data vector_cosine_ops) WITH (lists = %s)',
+        list_count
+    );
+END $$;
+
+-- 更新统计信息，便于规划器选择向量索引
+ANALYZE embeddings;
@@ -0,0 +1,9 @@
+-- providers / models / users 等值查询的复合索引
+-- providers：按 (user_id, provider) 查询并过滤 is_delete（查找、exists），三列都在索引中，软删除校验可以只走索引完成
+-- models：按 (provider_name, model_name) 查找单个模型
+-- users：用户名或邮箱查重（username = ... OR email = ...）由两个单列索引经 BitmapOr 合并
+
+CREATE INDEX IF NOT EXISTS ix_providers_user_provider_is_delete ON providers (user_id, provider, is_delete);
+CREATE INDEX IF NOT EXISTS ix_models_provider_name_model_name ON models (provider_name, model_name);
+CREATE INDEX IF NOT EXISTS ix_users_username ON users (username);
+CREATE INDEX IF NOT EXISTS ix_users_email ON users (email);
@@ -0,0 +1,5 @@
+-- providers.provider 单列索引
+-- 默认embedding配置按提供商名称取任一凭证（WHERE provider = ... LIMIT 1），
+-- 唯一约束 unique_user_provider 以 user_id 为前导列，无法支撑该查询，需单独建索引
+
+CREATE INDEX IF NOT EXISTS ix_providers_provider ON providers (provider);
@@ -5,7 +5,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from ..infrastructure.database import create_tables
+from ..infrastructure.database import create_tables, warm_up_pool
 from .controllers.provider_controller import router as provider_router
 from .controllers.model_controller import router as model_router
 from .controllers.knowledge_controller import router as knowledge_router
@@ -17,6 +17,8 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时创建数据库表
     await create_tables()
+    # 预热连接池
+    await warm_up_pool()
     yield
     # 关闭时的清理工作（如果需要）
 
@@ -38,7 +38,6 @@ from ...domain.knowledge.services.document_parser_service import DocumentParserS
 from ...domain.knowledge.services.chunking.document_chunking_service import DocumentChunkingService
 from ...domain.knowledge.vo.workflow_config import FileUploadConfig
 from ...infrastructure.parsers.document_parsers import TextDocumentParser, DefaultDocumentParser
-from ...infrastructure.repositories.provider.provider_repository_impl import ProviderRepositoryImpl
 from ...infrastructure.models.provider_models import ModelModel, ProviderModel
 from ...application.services.embedding_app_service import EmbeddingApplicationService
 from ...infrastructure.repositories.knowledge.embedding_config_repository_impl import EmbeddingConfigRepositoryImpl
@@ -614,49 +613,47 @@ async def get_available_embedding_models(
     """获取用户可用的embedding模型"""
     try:
         
-        # 1. 查询用户有权访问的提供商列表
-        provider_repo = ProviderRepositoryImpl(session)
-        # 直接使用字符串用户ID（UUID格式）
-        user_providers = await provider_repo.find_by_user_id(current_user_id)
-        
-        # 获取用户配置的提供商名称列表
-        user_provider_names = {provider.provider for provider in user_providers if not provider.is_delete}
+        # 1. 查询用户配置的提供商名称（只取名称列，不加载、不转换API Key等字段）
+        user_providers_stmt = select(ProviderModel.provider).where(
+            and_(
+                ProviderModel.user_id == current_user_id,
+                ProviderModel.is_delete == 0
+            )
+        )
+        result = await session.execute(user_providers_stmt)
+        # (user_id, provider) 唯一，名称不会重复
+        user_provider_names = list(result.scalars())
         
-        # 2. 从ModelModel表查询所有embedding类型的模型
+        # 2. 在数据库中按用户的提供商过滤embedding模型并排序，只返回用户有权访问的模型
         stmt = select(ModelModel).where(
             and_(
                 ModelModel.type == 'embedding',
-                ModelModel.is_delete == 0
+                ModelModel.is_delete == 0,
+                ModelModel.provider_name.in_(user_provider_names)
             )
-        )
-        result = await session.execute(stmt)
-        all_embedding_models = result.scalars().all()
+        ).order_by(ModelModel.provider_name, ModelModel.model_name)
+        models = (await session.execute(stmt)).scalars() if user_provider_names else ()
         
-        # 3. 过滤用户有权访问的模型
+        # 3. 组装模型信息
         available_models = []
-        for model in all_embedding_models:
-            # 检查用户是否配置了该提供商
-            if model.provider_name in user_provider_names:
-                metadata = model.get_metadata_dict()
-                
-                model_info = {
-                    "provider": model.provider_name,
-                    "model_name": model.model_name,
-                    "display_name": model.model_name,
-                    "description": metadata.get('description', f'{model.provider_name}的{model.model_name}模型'),
-                    "capabilities": metadata.get('capabilities', []),
-                    "context_length": metadata.get('context_length', 0),
-                    "subtype": model.subtype
-                }
-                available_models.append(model_info)
-        
-        # 4. 按提供商和模型名称排序
-        available_models.sort(key=lambda x: (x['provider'], x['model_name']))
+        for model in models:
+            metadata = model.get_metadata_dict()
+            
+            model_info = {
+                "provider": model.provider_name,
+                "model_name": model.model_name,
+                "display_name": model.model_name,
+                "description": metadata.get('description', f'{model.provider_name}的{model.model_name}模型'),
+                "capabilities": metadata.get('capabilities', []),
+                "context_length": metadata.get('context_length', 0),
+                "subtype": model.subtype
+            }
+            available_models.append(model_info)
         
         return {
             "models": available_models,
             "total": len(available_models),
-            "user_providers": list(user_provider_names)
+            "user_providers": user_provider_names
         }
         
     except Exception as e:
@@ -129,13 +129,11 @@ class EmbeddingApplicationService:
             处理结果
         """
         try:
-            # 1. 获取所有需要处理的分块
-            chunks_without_vectors = await self.document_chunk_repo.find_chunks_without_vectors(knowledge_base_id)
-            
-            if not chunks_without_vectors:
+            # 所有分块都已有向量时直接返回，不查配置也不创建embedding客户端
+            if not await self.document_chunk_repo.has_chunks_without_vectors(knowledge_base_id):
                 return EmbeddingProcessResult.success_result(0, 0, "所有分块都已有向量")
             
-            # 2. 获取embedding配置
+            # 1. 获取embedding配置
             embedding_config = await self.embedding_config_repo.get_embedding_config_by_knowledge_base_id(
                 knowledge_base_id, user_id
             )
@@ -143,32 +141,28 @@ class EmbeddingApplicationService:
             if not embedding_config:
                 embedding_config = await self.embedding_config_repo.get_default_embedding_config()
             
-            # 3. 创建embedding领域服务
+            # 2. 创建embedding领域服务
             embedding_domain_service = await self._create_embedding_domain_service(embedding_config)
             if not embedding_domain_service:
                 return EmbeddingProcessResult.failure_result("无法创建embedding服务")
             
             try:
-                # 4. 批量处理embedding
+                # 3. 流式取出没有向量的分块，逐批生成embedding并批量写入
                 processed_count = 0
                 failed_count = 0
                 batch_size = embedding_config.batch_size
                 
-                for i in range(0, len(chunks_without_vectors), batch_size):
-                    batch_chunks = chunks_without_vectors[i:i + batch_size]
-                    
+                async for batch_chunks in self.document_chunk_repo.stream_chunks_without_vectors(
+                    knowledge_base_id, batch_size
+                ):
                     try:
                         # 批量生成embedding
                         updated_chunks = await embedding_domain_service.generate_chunk_embeddings(batch_chunks)
                         
-                        # 批量保存更新的分块
-                        for chunk in updated_chunks:
-                            try:
-                                await self.document_chunk_repo.update(chunk)
-                                processed_count += 1
-                            except Exception as update_error:
-                                print(f"更新分块 {chunk.chunk_index} 失败: {str(update_error)}")
-                                failed_count += 1
+                        # 批量保存向量（一条多行UPSERT）
+                        saved_count = await self.document_chunk_repo.update_vectors(updated_chunks)
+                        processed_count += saved_count
+                        failed_count += len(batch_chunks) - saved_count
                         
                         print(f"批次处理完成: {len(batch_chunks)} 个分块")
                         
@@ -177,6 +171,9 @@ class EmbeddingApplicationService:
                         failed_count += len(batch_chunks)
                         continue
                 
+                if processed_count == 0 and failed_count == 0:
+                    return EmbeddingProcessResult.success_result(0, 0, "所有分块都已有向量")
+                
                 return EmbeddingProcessResult.success_result(
                     processed_count, failed_count, embedding_domain_service.get_model_name()
                 )
@@ -7,6 +7,7 @@ from datetime import datetime
 from ...application.dto.provider_dto import SaveProviderRequest, SaveProviderResponse, ProviderResponse
 from ...domain.provider.services.provider_domain_service import ProviderDomainService
 from ...domain.provider.entities.provider import Provider
+from ...domain.provider.value_objects.provider_summary import ProviderSummary
 from ...domain.provider.exceptions import ProviderDomainError, RepositoryError
 from ...infrastructure.security import encryption_service
 
@@ -80,12 +81,45 @@ class ProviderApplicationService:
             Provider响应列表
         """
         try:
-            providers = await self._provider_domain_service.get_user_providers(user_id)
-            return [self._convert_to_response_dto(provider) for provider in providers]
+            # 列表展示只需摘要列，不构建Provider实体及其值对象
+            summaries = await self._provider_domain_service.get_user_provider_summaries(user_id)
+            # 列表只展示掩码：掩码按密文缓存，不必每次整批解密
+            masked_api_keys = encryption_service.mask_encrypted_many(
+                [summary.encrypted_api_key for summary in summaries]
+            )
+            return [
+                self._convert_summary_to_response_dto(summary, masked_api_key)
+                for summary, masked_api_key in zip(summaries, masked_api_keys)
+            ]
         except Exception:
             # 查询失败时返回空列表
             return []
     
+    def _convert_summary_to_response_dto(
+        self,
+        summary: ProviderSummary,
+        masked_api_key: str
+    ) -> ProviderResponse:
+        """
+        将Provider摘要转换为响应DTO
+        
+        Args:
+            summary: Provider摘要
+            masked_api_key: 掩码后的API Key
+            
+        Returns:
+            Provider响应DTO
+        """
+        return ProviderResponse(
+            id=summary.id,
+            user_id=summary.user_id,
+            provider=summary.provider,
+            api_key_masked=masked_api_key,
+            base_url=(summary.base_url or '').strip() or None,
+            created_at=summary.created_at.isoformat() if summary.created_at else None,
+            updated_at=summary.updated_at.isoformat() if summary.updated_at else None
+        )
+    
     def _convert_to_response_dto(self, provider: Provider) -> ProviderResponse:
         """
         将Provider实体转换为响应DTO
@@ -69,7 +69,7 @@ class UserApplicationService:
         await self._user_domain_service.validate_user_uniqueness(username_vo, email_vo)
         
         # 4. 加密密码
-        hashed_password = self._password_service.hash_password(password_vo)
+        hashed_password = await self._password_service.hash_password_async(password_vo)
         
         # 5. 创建用户实体
         user = User.create(
@@ -128,7 +128,7 @@ class UserApplicationService:
         await self._user_domain_service.validate_user_can_login(user)
         
         # 3. 验证密码
-        if not self._password_service.verify_password(password, user.password_hash):
+        if not await self._password_service.verify_password_async(password, user.password_hash):
             raise ValueError("用户名或密码错误")
         
         # 4. 更新最后登录时间
@@ -243,7 +243,7 @@ class UserApplicationService:
             raise ValueError("用户不存在")
         
         # 2. 验证旧密码
-        if not self._password_service.verify_password(old_password, user.password_hash):
+        if not await self._password_service.verify_password_async(old_password, user.password_hash):
             raise ValueError("旧密码错误")
         
         # 3. 验证新密码强度
@@ -251,7 +251,7 @@ class UserApplicationService:
         
         # 4. 加密新密码
         new_password_vo = Password.create(new_password)
-        new_hashed_password = self._password_service.hash_password(new_password_vo)
+        new_hashed_password = await self._password_service.hash_password_async(new_password_vo)
         
         # 5. 更新密码
         user.update_password(new_hashed_password)
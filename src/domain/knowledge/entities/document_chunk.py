@@ -5,6 +5,7 @@
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import json
 import uuid
 
 
@@ -58,9 +59,23 @@ class DocumentChunk:
         self.metadata[key] = value
         self.updated_at = datetime.now()
     
+    def set_metadata(self, metadata: Dict[str, Any]) -> None:
+        """替换元数据"""
+        self.metadata = metadata
+        self.updated_at = datetime.now()
+    
+    def get_metadata_json(self) -> str:
+        """获取JSON格式的元数据（每次按当前元数据序列化，就地修改 metadata 后同样生效）"""
+        return json.dumps(self.metadata or {})
+    
+    @property
+    def char_size(self) -> int:
+        """分块字符数（对应chunks表char_size列，按字符而非UTF-8字节计）"""
+        return len(self.content)
+    
     def get_char_count(self) -> int:
         """获取字符数"""
-        return len(self.content)
+        return self.char_size
     
     def get_word_count(self) -> int:
         """获取词数（简单按空格分割）"""
@@ -3,7 +3,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from ..entities.document_chunk import DocumentChunk
 from ..vo.search_query import SearchQuery, SearchResult
 
@@ -36,6 +36,11 @@ class DocumentChunkRepository(ABC):
         """根据知识库ID查找文档块列表"""
         pass
     
+    @abstractmethod
+    def iter_by_knowledge_base_id(self, knowledge_base_id: str) -> AsyncIterator[DocumentChunk]:
+        """根据知识库ID流式遍历文档块（内存占用与批大小相关而非结果总量）"""
+        pass
+    
     @abstractmethod
     async def update(self, chunk: DocumentChunk) -> DocumentChunk:
         """更新文档块"""
@@ -61,6 +66,11 @@ class DocumentChunkRepository(ABC):
         """统计知识库中的文档块数量"""
         pass
     
+    @abstractmethod
+    async def count_estimate(self, knowledge_base_id: str) -> int:
+        """估算知识库中的文档块数量（基于统计信息，不保证精确）"""
+        pass
+    
     @abstractmethod
     async def count_by_document_id(self, document_id: str) -> int:
         """统计文档中的文档块数量"""
@@ -79,4 +89,21 @@ class DocumentChunkRepository(ABC):
     @abstractmethod
     async def find_chunks_without_vectors(self, knowledge_base_id: str) -> List[DocumentChunk]:
         """查找没有向量的文档块"""
+        pass
+    
+    @abstractmethod
+    async def has_chunks_without_vectors(self, knowledge_base_id: str) -> bool:
+        """是否存在没有向量的文档块"""
+        pass
+    
+    @abstractmethod
+    def stream_chunks_without_vectors(
+        self, knowledge_base_id: str, batch_size: int
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """按批流式遍历没有向量的文档块"""
+        pass
+    
+    @abstractmethod
+    async def update_vectors(self, chunks: List[DocumentChunk]) -> int:
+        """批量写入文档块的向量（只写向量，不更新分块内容）"""
         pass
\ No newline at end of file
@@ -55,6 +55,11 @@ class DocumentRepository(ABC):
         """统计知识库中的文档数量"""
         pass
     
+    @abstractmethod
+    async def count_estimate(self, knowledge_base_id: str) -> int:
+        """估算知识库中的文档数量（基于统计信息，不保证精确）"""
+        pass
+    
     @abstractmethod
     async def find_by_filename_pattern(self, knowledge_base_id: str, pattern: str) -> List[Document]:
         """根据文件名模式查找文档"""
@@ -1,11 +1,15 @@
 """
 知识库领域 - Embedding配置值对象
 """
+import sys
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
+# Python 3.10+ 的 dataclass 支持 slots=True，去掉实例 __dict__；3.9 下退化为普通 dataclass
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, **_SLOTS)
 class EmbeddingModelConfig:
     """Embedding模型配置值对象"""
     
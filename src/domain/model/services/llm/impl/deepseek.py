@@ -2,8 +2,8 @@ from typing import List, Dict, Any, Optional
 from openai import OpenAI
 
 from ..base import BaseLLM
-from ..config.models import DeepSeekConfig
-from ..config.base import ModelProvider
+from ...config.models import DeepSeekConfig
+from ...config.base import ModelProvider
 from ..registry import register_model
 
 
@@ -3,8 +3,8 @@ from typing import List, Dict, Any, Optional
 from openai import OpenAI
 
 from ..base import BaseLLM
-from ..config.models import SiliconflowConfig
-from ..config.base import ModelProvider
+from ...config.models import SiliconflowConfig
+from ...config.base import ModelProvider
 from ..registry import register_model
 
 
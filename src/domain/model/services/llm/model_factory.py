@@ -2,7 +2,7 @@
 
 from typing import Dict, Type, Optional, Union
 from .registry import ModelRegistry
-from .config.models import ModelConfigFactory
+from ..config.models import ModelConfigFactory
 
 
 class ModelFactory:
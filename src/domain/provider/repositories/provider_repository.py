@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 
 from ..entities.provider import Provider
+from ..value_objects.provider_summary import ProviderSummary
 
 
 class ProviderRepository(ABC):
@@ -69,6 +70,19 @@ class ProviderRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def find_summaries_by_user_id(self, user_id: str) -> List[ProviderSummary]:
+        """
+        根据用户ID查找所有Provider的摘要（只查询展示所需的列，不构建实体）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            Provider摘要列表
+        """
+        pass
+    
     @abstractmethod
     async def update(self, provider: Provider) -> Provider:
         """
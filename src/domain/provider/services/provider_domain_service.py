@@ -4,6 +4,7 @@ Provider领域服务
 from typing import Optional
 
 from ..entities.provider import Provider
+from ..value_objects.provider_summary import ProviderSummary
 from ..repositories.provider_repository import ProviderRepository
 from ..exceptions import ProviderAlreadyExistsError, ProviderNotFoundError
 from ....infrastructure.security import encryption_service
@@ -106,4 +107,16 @@ class ProviderDomainService:
         Returns:
             Provider实体列表
         """
-        return await self._provider_repository.find_by_user_id(user_id)
\ No newline at end of file
+        return await self._provider_repository.find_by_user_id(user_id)
+    
+    async def get_user_provider_summaries(self, user_id: str) -> list[ProviderSummary]:
+        """
+        获取用户所有提供商的摘要（列表展示用，不构建实体）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            Provider摘要列表
+        """
+        return await self._provider_repository.find_summaries_by_user_id(user_id)
\ No newline at end of file
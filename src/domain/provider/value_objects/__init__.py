@@ -1,4 +1,5 @@
 from .api_key import ApiKey
 from .base_url import BaseUrl
+from .provider_summary import ProviderSummary
 
-__all__ = ['ApiKey', 'BaseUrl']
\ No newline at end of file
+__all__ = ['ApiKey', 'BaseUrl', 'ProviderSummary']
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Provider 摘要值对象
+"""
+from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class ProviderSummary:
+    """
+    Provider 列表展示用的只读投影
+    
+    直接由查询列构建，不创建 ApiKey/BaseUrl 值对象、不做校验；需要完整业务行为时使用 Provider 实体
+    """
+    id: str
+    user_id: str
+    provider: str
+    encrypted_api_key: str
+    base_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
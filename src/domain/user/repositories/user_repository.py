@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from ..entities.user import User
 from ..value_objects.username import Username
@@ -44,6 +44,11 @@ class UserRepository(ABC):
         """检查邮箱是否存在"""
         pass
     
+    @abstractmethod
+    async def check_username_email_taken(self, username: Username, email: Email) -> Tuple[bool, bool]:
+        """一次查询同时检查用户名与邮箱是否已被占用，返回 (用户名已存在, 邮箱已存在)"""
+        pass
+    
     @abstractmethod
     async def update(self, user: User) -> User:
         """更新用户"""
@@ -50,10 +50,12 @@ class UserDomainService:
         Raises:
             ValueError: 当用户名或邮箱已存在时
         """
-        if not await self.is_username_available(username):
+        # 用户名与邮箱在一次查询中同时检查
+        username_taken, email_taken = await self._user_repository.check_username_email_taken(username, email)
+        if username_taken:
             raise ValueError(f"用户名 '{username.value}' 已存在")
         
-        if not await self.is_email_available(email):
+        if email_taken:
             raise ValueError(f"邮箱 '{email.value}' 已存在")
     
     async def find_user_by_login_identifier(self, identifier: str) -> Optional[User]:
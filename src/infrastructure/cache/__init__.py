@@ -0,0 +1,8 @@
+from .redis_cache import RedisCache, get_redis_cache
+from .invalidation import invalidate_after_commit
+
+__all__ = [
+    'RedisCache',
+    'get_redis_cache',
+    'invalidate_after_commit'
+]
@@ -0,0 +1,60 @@
+"""
+事务提交后失效Redis缓存
+仓储在事务中登记需要删除的缓存键，会话提交成功后才真正删除；回滚时丢弃登记，
+避免提交前删除后被并发读取用旧数据重新写回，或回滚后白白删除
+"""
+import asyncio
+import logging
+from typing import Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .redis_cache import get_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# 会话info中登记待删除键与通配模式的位置
+_PENDING_KEYS = '_cache_invalidate_keys'
+_PENDING_PATTERNS = '_cache_invalidate_patterns'
+
+# 进行中的删除任务（保持引用，避免任务未完成即被回收）
+_tasks: Set[asyncio.Task] = set()
+
+
+def invalidate_after_commit(session: AsyncSession, *keys: str, patterns: tuple = ()) -> None:
+    """登记在当前事务提交后删除的缓存键与通配模式"""
+    info = session.info
+    info.setdefault(_PENDING_KEYS, set()).update(keys)
+    info.setdefault(_PENDING_PATTERNS, set()).update(patterns)
+
+
+async def _delete(keys: Set[str], patterns: Set[str]) -> None:
+    cache = get_redis_cache()
+    await cache.delete(*keys)
+    for pattern in patterns:
+        await cache.delete_pattern(pattern)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session: Session) -> None:
+    keys = session.info.pop(_PENDING_KEYS, None) or set()
+    patterns = session.info.pop(_PENDING_PATTERNS, None) or set()
+    if not keys and not patterns:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning("提交时没有运行中的事件循环，跳过缓存失效 keys=%s patterns=%s", keys, patterns)
+        return
+    # 事件回调是同步的，删除操作交给事件循环异步执行（RedisCache内部已处理Redis不可用）
+    task = loop.create_task(_delete(keys, patterns))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEYS, None)
+    session.info.pop(_PENDING_PATTERNS, None)
@@ -0,0 +1,91 @@
+"""
+Redis缓存
+缓存只用于加速读取：Redis不可用时读取按未命中处理、写入和删除直接忽略，调用方回退到数据库
+"""
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import redis.asyncio as redis
+
+# 可选使用orjson编解码缓存值（比标准库json快数倍，输出为紧凑UTF-8字节），未安装时回退到json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+# Redis连接配置
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "10"))
+# 建连与读写超时（秒）：Redis不可达时尽快抛出RedisError走数据库回退，而不是等待系统TCP超时
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "0.5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache:
+    """基于Redis的JSON值缓存"""
+    
+    def __init__(self, client: redis.Redis):
+        self.client = client
+    
+    async def get_json(self, key: str) -> Optional[Any]:
+        """读取JSON值，未命中或Redis不可用时返回None"""
+        try:
+            value = await self.client.get(key)
+        except redis.RedisError as e:
+            logger.warning("读取Redis缓存失败 key=%s: %s", key, e)
+            return None
+        return _json_loads(value) if value is not None else None
+    
+    async def set_json(self, key: str, value: Any, ttl: int) -> None:
+        """写入JSON值并设置过期时间（秒）"""
+        try:
+            await self.client.setex(key, ttl, _json_dumps(value))
+        except redis.RedisError as e:
+            logger.warning("写入Redis缓存失败 key=%s: %s", key, e)
+    
+    async def delete(self, *keys: str) -> None:
+        """删除指定键"""
+        if not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning("删除Redis缓存失败 keys=%s: %s", keys, e)
+    
+    async def delete_pattern(self, pattern: str) -> None:
+        """删除匹配通配模式的所有键（SCAN遍历，不阻塞Redis）"""
+        try:
+            keys = [key async for key in self.client.scan_iter(match=pattern, count=100)]
+            if keys:
+                await self.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning("按模式删除Redis缓存失败 pattern=%s: %s", pattern, e)
+
+
+_redis_cache: Optional[RedisCache] = None
+
+
+def get_redis_cache() -> RedisCache:
+    """获取全局Redis缓存实例（首次调用时创建连接池）"""
+    global _redis_cache
+    if _redis_cache is None:
+        client = redis.from_url(
+            REDIS_URL,
+            password=REDIS_PASSWORD,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            decode_responses=True
+        )
+        _redis_cache = RedisCache(client)
+    return _redis_cache
@@ -4,18 +4,118 @@ chunks表字段：id, document_id, dataset_id, parent_chunk_id, chunk_type, chun
 embeddings表字段：id, chunk_id, embedding_data(vector), embedding_model_id, version, created_at
 """
 
+import asyncio
 import json
-from typing import List, Optional, Dict, Any
+import os
+from dataclasses import replace
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....domain.knowledge.entities.document_chunk import DocumentChunk
 from ....domain.knowledge.repositories.document_chunk_repository import DocumentChunkRepository
 from ....domain.knowledge.vo.search_query import SearchQuery, SearchResult
-from .embedding_vector_repository import EmbeddingVectorRepositoryImpl
+from .embedding_vector_repository import EMBEDDING_VECTOR_TYPE, EmbeddingVectorRepositoryImpl
+from ....infrastructure.database import AsyncSessionLocal, copy_records_to_table, estimate_row_count
 from ....infrastructure.utils.uuid_generator import uuid_generator
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# chunks表插入列（与 _to_params 返回的键保持一致）
+_CHUNK_COLUMNS = (
+    'id', 'document_id', 'dataset_id', 'content', 'char_size',
+    'index_in_doc', 'meta', 'is_active', 'created_at',
+)
+
+# chunks表查询列（顺序固定，_from_row 按位置读取）
+_CHUNK_SELECT_COLUMNS = 'id, document_id, dataset_id, content, char_size, index_in_doc, meta, created_at'
+_CHUNK_SELECT_COLUMNS_C = ', '.join(f'c.{column.strip()}' for column in _CHUNK_SELECT_COLUMNS.split(','))
+
+# 高频查询语句在模块加载时构建一次，语句文本固定以命中SQLAlchemy编译缓存和asyncpg预编译语句缓存
+# 绑定参数不指定类型：asyncpg方言会为带类型的参数渲染 ::VARCHAR 等显式转换，与ID列类型冲突
+_FIND_BY_ID_SQL = text(
+    f"SELECT {_CHUNK_SELECT_COLUMNS} FROM chunks WHERE id = :chunk_id AND is_active = true"
+).bindparams(bindparam("chunk_id"))
+_FIND_BY_DOCUMENT_SQL = text(
+    f"SELECT {_CHUNK_SELECT_COLUMNS} FROM chunks WHERE document_id = :document_id AND is_active = true ORDER BY index_in_doc ASC"
+).bindparams(bindparam("document_id"))
+_FIND_BY_KNOWLEDGE_BASE_SQL = text(
+    f"SELECT {_CHUNK_SELECT_COLUMNS} FROM chunks WHERE dataset_id = :dataset_id AND is_active = true ORDER BY created_at DESC"
+).bindparams(bindparam("dataset_id"))
+_DEACTIVATE_BY_ID_SQL = text(
+    "UPDATE chunks SET is_active = false WHERE id = :chunk_id"
+).bindparams(bindparam("chunk_id"))
+_COUNT_BY_KNOWLEDGE_BASE_SQL = text(
+    "SELECT COUNT(*) FROM chunks WHERE dataset_id = :dataset_id AND is_active = true"
+).bindparams(bindparam("dataset_id"))
+_COUNT_BY_DOCUMENT_SQL = text(
+    "SELECT COUNT(*) FROM chunks WHERE document_id = :document_id AND is_active = true"
+).bindparams(bindparam("document_id"))
+
+# 没有向量的有效分块（NOT EXISTS 反连接，大表上通常优于 LEFT JOIN ... IS NULL）
+_FIND_WITHOUT_VECTORS_SQL = text(f"""
+SELECT {_CHUNK_SELECT_COLUMNS_C}
+FROM chunks c
+WHERE c.dataset_id = :dataset_id
+  AND c.is_active = true
+  AND NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.chunk_id = c.id)
+ORDER BY c.created_at DESC
+""").bindparams(bindparam("dataset_id"))
+
+# 是否存在没有向量的有效分块（找到一行即停止扫描）
+_HAS_WITHOUT_VECTORS_SQL = text("""
+SELECT EXISTS (
+    SELECT 1 FROM chunks c
+    WHERE c.dataset_id = :dataset_id
+      AND c.is_active = true
+      AND NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.chunk_id = c.id)
+)
+""").bindparams(bindparam("dataset_id"))
+
+# 单条多行INSERT的最大行数（PostgreSQL单语句绑定参数上限为32767）
+_INSERT_BATCH_SIZE = 1000
+
+# 流式查询每批从服务端游标预取的行数
+_STREAM_BATCH_SIZE = 1000
+
+# 达到该行数时改用COPY协议写入
+_COPY_THRESHOLD = 100
+
+# search_similar 是否同时执行关键词检索（混合检索），默认只做向量检索
+_HYBRID_SEARCH = os.getenv("CHUNK_HYBRID_SEARCH", "false").lower() in ("1", "true", "yes")
+
+# 倒数排名融合（RRF）的平滑常数
+_RRF_K = 60
+
+# 以可写CTE（written）返回的分块ID写入embeddings，与分块写入同一往返完成
+_EMBEDDING_UPSERT_FROM_CTE = f"""
+INSERT INTO embeddings (id, chunk_id, embedding_data, embedding_model_id, version)
+SELECT :embedding_id, written.id, CAST(:embedding_data AS {EMBEDDING_VECTOR_TYPE}), :embedding_model_id, :version
+FROM written
+ON CONFLICT (chunk_id)
+DO UPDATE SET
+    embedding_data = EXCLUDED.embedding_data,
+    embedding_model_id = EXCLUDED.embedding_model_id,
+    version = EXCLUDED.version,
+    created_at = CURRENT_TIMESTAMP
+RETURNING chunk_id
+"""
+
+
+def _decode_meta(meta_data: Any) -> Dict[str, Any]:
+    """解析meta字段，可能是JSON字符串也可能是字典"""
+    if isinstance(meta_data, (str, bytes)):
+        try:
+            meta_data = _json_loads(meta_data)
+        except ValueError:
+            return {}
+    return meta_data if isinstance(meta_data, dict) else {}
+
 
 class DocumentChunkRepositoryImpl(DocumentChunkRepository):
     """文档分块仓储SQL实现 - 基于 chunks 表和 embeddings 表"""
@@ -25,137 +125,163 @@ class DocumentChunkRepositoryImpl(DocumentChunkRepository):
         self.embedding_repo = EmbeddingVectorRepositoryImpl(session)
     
     async def save(self, chunk: DocumentChunk) -> DocumentChunk:
-        """保存文档块到 chunks 表"""
-        # 如果chunk没有ID，生成一个UUID
-        if not chunk.chunk_id:
-            chunk.chunk_id = uuid_generator.generate()
-        
-        sql = """
+        """保存文档块到 chunks 表（有向量时与 embeddings 写入合并为一条语句）"""
+        insert_sql = """
         INSERT INTO chunks (id, document_id, dataset_id, content, char_size, index_in_doc, meta, is_active, created_at)
         VALUES (:id, :document_id, :dataset_id, :content, :char_size, :index_in_doc, :meta, :is_active, :created_at)
         RETURNING id
         """
+        params = self._to_params(chunk)
         
-        chunk_data = {
-            'id': chunk.chunk_id,
-            'document_id': chunk.document_id,
-            'dataset_id': chunk.knowledge_base_id,
-            'content': chunk.content,
-            'char_size': len(chunk.content),
-            'index_in_doc': chunk.chunk_index,
-            'meta': json.dumps(chunk.metadata or {}),
-            'is_active': True,
-            'created_at': chunk.created_at or datetime.now(),
-        }
+        if chunk.has_vector():
+            # 可写CTE：chunks插入与embeddings写入一次往返完成
+            sql = f"""
+            WITH written AS ({insert_sql})
+            {_EMBEDDING_UPSERT_FROM_CTE}
+            """
+            params.update(self._embedding_params(chunk))
+        else:
+            sql = insert_sql
         
-        result = await self.session.execute(text(sql), chunk_data)
+        result = await self.session.execute(text(sql), params)
         row = result.fetchone()
         if row:
             chunk.chunk_id = str(row[0])
         
-        # 如果chunk有向量数据，保存到embeddings表
-        if chunk.has_vector():
-            await self.embedding_repo.save_embedding(
-                chunk_id=chunk.chunk_id,
-                embedding_data=chunk.vector,
-                embedding_model_id='default',  # 可以从chunk的metadata中获取
-                version=1
-            )
-        
         return chunk
     
     async def save_batch(self, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
-        """批量保存文档块"""
-        for chunk in chunks:
-            await self.save(chunk)
+        """批量保存文档块（大批量走COPY，否则每批一条多行 VALUES 的 INSERT）"""
+        if not chunks:
+            return []
+        
+        # 分块ID已由实体在创建时生成（DocumentChunk.__post_init__）
+        now = datetime.now()
+        use_copy = len(chunks) >= _COPY_THRESHOLD
+        if use_copy:
+            records = [
+                tuple(params[column] for column in _CHUNK_COLUMNS)
+                for params in (self._to_params(chunk, now) for chunk in chunks)
+            ]
+            await copy_records_to_table(self.session, 'chunks', _CHUNK_COLUMNS, records)
+        else:
+            await self._insert_values(chunks, now)
+        
+        # 向量数据统一交给embedding仓储批量写入；
+        # COPY写入的分块是全新插入的，不可能已有向量，向量同样走COPY
+        embeddings_data = [
+            {
+                'chunk_id': chunk.chunk_id,
+                'embedding_data': chunk.vector,
+                'embedding_model_id': 'default',
+                'version': 1,
+            }
+            for chunk in chunks if chunk.has_vector()
+        ]
+        if embeddings_data:
+            if use_copy:
+                unique_data = list({data['chunk_id']: data for data in embeddings_data}.values())
+                await self.embedding_repo.batch_copy_embeddings(unique_data)
+            else:
+                await self.embedding_repo.batch_save_embeddings(embeddings_data)
+        
         return chunks
     
     async def find_by_id(self, chunk_id: str) -> Optional[DocumentChunk]:
         """根据ID查找文档块"""
-        sql = "SELECT * FROM chunks WHERE id = :chunk_id AND is_active = true"
-        result = await self.session.execute(text(sql), {"chunk_id": chunk_id})
+        result = await self.session.execute(_FIND_BY_ID_SQL, {"chunk_id": chunk_id})
         row = result.fetchone()
-        return self._from_dict(dict(row._mapping)) if row else None
+        return self._from_row(row) if row else None
     
     async def find_by_document_id(self, document_id: str) -> List[DocumentChunk]:
         """根据文档ID查找文档块列表"""
-        sql = "SELECT * FROM chunks WHERE document_id = :document_id AND is_active = true ORDER BY index_in_doc ASC"
-        result = await self.session.execute(text(sql), {"document_id": document_id})
+        result = await self.session.execute(_FIND_BY_DOCUMENT_SQL, {"document_id": document_id})
         rows = result.fetchall()
-        return [self._from_dict(dict(row._mapping)) for row in rows]
+        return [self._from_row(row) for row in rows]
     
     async def find_by_knowledge_base_id(self, knowledge_base_id: str) -> List[DocumentChunk]:
         """根据知识库ID查找文档块列表"""
-        sql = "SELECT * FROM chunks WHERE dataset_id = :dataset_id AND is_active = true ORDER BY created_at DESC"
-        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id})
-        rows = result.fetchall()
-        return [self._from_dict(dict(row._mapping)) for row in rows]
+        return [chunk async for chunk in self.iter_by_knowledge_base_id(knowledge_base_id)]
+    
+    async def iter_by_knowledge_base_id(self, knowledge_base_id: str) -> AsyncIterator[DocumentChunk]:
+        """根据知识库ID流式遍历文档块（服务端游标，每次预取 _STREAM_BATCH_SIZE 行）"""
+        result = await self.session.stream(_FIND_BY_KNOWLEDGE_BASE_SQL, {"dataset_id": knowledge_base_id})
+        async for row in result.yield_per(_STREAM_BATCH_SIZE):
+            yield self._from_row(row)
     
     async def find_chunks_without_vectors(self, knowledge_base_id: str) -> List[DocumentChunk]:
-        """查找没有向量的分块"""
-        # 使用embedding仓储查找没有向量的chunk ID
-        chunk_ids_without_vectors = await self.embedding_repo.find_chunks_without_embeddings(knowledge_base_id)
-        
-        if not chunk_ids_without_vectors:
-            return []
-        
-        # 根据chunk ID查询chunk详细信息
-        placeholders = ','.join([f':id_{i}' for i in range(len(chunk_ids_without_vectors))])
-        sql = f"""
-        SELECT * FROM chunks 
-        WHERE id IN ({placeholders})
-        AND is_active = true 
-        ORDER BY created_at DESC
-        """
-        
-        params = {f'id_{i}': chunk_id for i, chunk_id in enumerate(chunk_ids_without_vectors)}
-        result = await self.session.execute(text(sql), params)
+        """查找没有向量的分块（NOT EXISTS 一次查询）"""
+        result = await self.session.execute(_FIND_WITHOUT_VECTORS_SQL, {"dataset_id": knowledge_base_id})
         rows = result.fetchall()
-        return [self._from_dict(dict(row._mapping)) for row in rows]
+        return [self._from_row(row) for row in rows]
+    
+    async def has_chunks_without_vectors(self, knowledge_base_id: str) -> bool:
+        """是否存在没有向量的分块（EXISTS 查询，不取回分块内容）"""
+        result = await self.session.execute(_HAS_WITHOUT_VECTORS_SQL, {"dataset_id": knowledge_base_id})
+        return bool(result.scalar())
+    
+    async def stream_chunks_without_vectors(
+        self, knowledge_base_id: str, batch_size: int = _STREAM_BATCH_SIZE
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """按批流式遍历没有向量的分块（服务端游标，不一次性取回全部分块）"""
+        result = await self.session.stream(_FIND_WITHOUT_VECTORS_SQL, {"dataset_id": knowledge_base_id})
+        async for rows in result.partitions(batch_size):
+            yield [self._from_row(row) for row in rows]
+    
+    async def update_vectors(self, chunks: List[DocumentChunk]) -> int:
+        """批量写入文档块的向量（每批一条多行UPSERT）"""
+        embeddings_data = [
+            {
+                'chunk_id': chunk.chunk_id,
+                'embedding_data': chunk.vector,
+                'embedding_model_id': 'default',
+                'version': 1,
+            }
+            for chunk in chunks if chunk.has_vector()
+        ]
+        if not embeddings_data:
+            return 0
+        return await self.embedding_repo.batch_save_embeddings(embeddings_data)
     
     async def update(self, chunk: DocumentChunk) -> DocumentChunk:
-        """更新文档块"""
-        sql = "UPDATE chunks SET content = :content, char_size = :char_size, meta = :meta WHERE id = :chunk_id"
+        """更新文档块（有向量时与 embeddings 写入合并为一条语句）"""
+        update_sql = "UPDATE chunks SET content = :content, char_size = :char_size, meta = :meta WHERE id = :chunk_id"
         chunk_data = {
             'content': chunk.content,
-            'char_size': len(chunk.content),
-            'meta': json.dumps(chunk.metadata or {}),
+            'char_size': chunk.char_size,
+            'meta': chunk.get_metadata_json(),
             'chunk_id': chunk.chunk_id  # 修复：使用字符串类型的chunk_id
         }
-        await self.session.execute(text(sql), chunk_data)
         
-        # 如果chunk有向量数据，更新embeddings表
         if chunk.has_vector():
-            await self.embedding_repo.save_embedding(
-                chunk_id=chunk.chunk_id,
-                embedding_data=chunk.vector,
-                embedding_model_id='default',  # 可以从chunk的metadata中获取
-                version=1
-            )
+            sql = f"""
+            WITH written AS ({update_sql} RETURNING id)
+            {_EMBEDDING_UPSERT_FROM_CTE}
+            """
+            chunk_data.update(self._embedding_params(chunk))
+        else:
+            sql = update_sql
         
+        await self.session.execute(text(sql), chunk_data)
         return chunk
     
     async def delete_by_id(self, chunk_id: str) -> bool:
         """根据ID删除文档块"""
-        sql = "UPDATE chunks SET is_active = false WHERE id = :chunk_id"
-        await self.session.execute(text(sql), {"chunk_id": chunk_id})
+        await self.session.execute(_DEACTIVATE_BY_ID_SQL, {"chunk_id": chunk_id})
         return True
     
     async def delete_by_document_id(self, document_id: str) -> int:
-        """根据文档ID删除所有文档块（硬删除，包括embedding向量）"""
-        # 先查询要删除的chunks数量
-        count_sql = "SELECT COUNT(*) FROM chunks WHERE document_id = :document_id"
-        count_result = await self.session.execute(text(count_sql), {"document_id": document_id})
-        deleted_count = count_result.scalar() or 0
-        
-        # 删除相关的embedding向量
-        await self.embedding_repo.delete_embeddings_by_document(document_id)
-        
-        # 硬删除chunks记录
-        delete_sql = "DELETE FROM chunks WHERE document_id = :document_id"
-        await self.session.execute(text(delete_sql), {"document_id": document_id})
-        
-        return deleted_count
+        """根据文档ID删除所有文档块（硬删除，包括embedding向量，单条语句完成）"""
+        sql = """
+        WITH deleted_chunks AS (
+            DELETE FROM chunks WHERE document_id = :document_id RETURNING id
+        ), deleted_embeddings AS (
+            DELETE FROM embeddings WHERE chunk_id IN (SELECT id FROM deleted_chunks)
+        )
+        SELECT COUNT(*) FROM deleted_chunks
+        """
+        result = await self.session.execute(text(sql), {"document_id": document_id})
+        return result.scalar() or 0
     
     async def delete_by_knowledge_base_id(self, knowledge_base_id: str) -> int:
         """根据知识库ID删除所有文档块"""
@@ -165,91 +291,106 @@ class DocumentChunkRepositoryImpl(DocumentChunkRepository):
     
     async def count_by_knowledge_base_id(self, knowledge_base_id: str) -> int:
         """统计知识库中的文档块数量"""
-        sql = "SELECT COUNT(*) FROM chunks WHERE dataset_id = :dataset_id AND is_active = true"
-        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id})
+        result = await self.session.execute(_COUNT_BY_KNOWLEDGE_BASE_SQL, {"dataset_id": knowledge_base_id})
         return result.scalar() or 0
     
+    async def count_estimate(self, knowledge_base_id: str) -> int:
+        """估算知识库中的文档块数量（规划器行数估计，避免COUNT(*)扫描）"""
+        sql = "SELECT 1 FROM chunks WHERE dataset_id = :dataset_id AND is_active = true"
+        return await estimate_row_count(self.session, sql, {"dataset_id": knowledge_base_id})
+    
     async def count_by_document_id(self, document_id: str) -> int:
         """统计文档的分块数量"""
-        sql = "SELECT COUNT(*) FROM chunks WHERE document_id = :document_id AND is_active = true"
-        result = await self.session.execute(text(sql), {"document_id": document_id})
+        result = await self.session.execute(_COUNT_BY_DOCUMENT_SQL, {"document_id": document_id})
         return result.scalar() or 0
     
     # 实现抽象方法
     async def search_by_content(self, query: SearchQuery) -> List[SearchResult]:
-        """根据内容搜索文档块"""
-        sql = "SELECT * FROM chunks WHERE dataset_id = :dataset_id AND content LIKE :query_text AND is_active = true LIMIT 10"
+        """根据内容搜索文档块（pg_trgm GIN索引匹配，按相关度排序）"""
+        sql = f"""
+        SELECT {_CHUNK_SELECT_COLUMNS}, word_similarity(:text, content) AS score
+        FROM chunks 
+        WHERE dataset_id = :dataset_id 
+          AND content LIKE :query_text 
+          AND is_active = true 
+        ORDER BY score DESC
+        LIMIT :limit
+        """
         result = await self.session.execute(text(sql), {
             "dataset_id": query.knowledge_base_id,
-            "query_text": f"%{query.text}%"
+            "text": query.text,
+            "query_text": f"%{query.text}%",
+            "limit": query.limit or 10
         })
         rows = result.fetchall()
         
         search_results = []
         for row in rows:
-            data = dict(row._mapping)
+            # 列顺序见 _CHUNK_SELECT_COLUMNS，score 位于其后
             search_result = SearchResult(
-                chunk_id=str(data['id']),
-                content=data['content'],
-                score=1.0,
-                document_id=str(data['document_id']),
-                chunk_index=data['index_in_doc'],
-                metadata=data.get('meta')
+                chunk_id=str(row[0]),
+                content=row[3],
+                score=float(row[8]),
+                document_id=str(row[1]),
+                chunk_index=row[5],
+                metadata=_decode_meta(row[6])
             )
             search_results.append(search_result)
         return search_results
     
     async def find_chunks_with_vectors(self, knowledge_base_id: str, limit: int = 100) -> List[DocumentChunk]:
-        """查找有向量的文档块"""
-        # 使用embedding仓储查找有向量的chunk ID
-        chunk_ids_with_vectors = await self.embedding_repo.find_chunks_with_embeddings(knowledge_base_id, limit)
-        
-        if not chunk_ids_with_vectors:
-            return []
-        
-        # 根据chunk ID查询chunk详细信息
-        placeholders = ','.join([f':id_{i}' for i in range(len(chunk_ids_with_vectors))])
+        """查找有向量的文档块（JOIN embeddings 一次查询并带回向量）"""
         sql = f"""
-        SELECT * FROM chunks 
-        WHERE id IN ({placeholders})
-        AND is_active = true 
-        ORDER BY created_at DESC
+        SELECT {_CHUNK_SELECT_COLUMNS_C}, e.embedding_data 
+        FROM chunks c 
+        JOIN embeddings e ON e.chunk_id = c.id 
+        WHERE c.dataset_id = :dataset_id 
+          AND c.is_active = true 
+        ORDER BY c.created_at DESC
+        LIMIT :limit
         """
         
-        params = {f'id_{i}': chunk_id for i, chunk_id in enumerate(chunk_ids_with_vectors)}
-        result = await self.session.execute(text(sql), params)
+        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id, "limit": limit})
         rows = result.fetchall()
         
-        # 加载向量数据
         chunks = []
         for row in rows:
-            chunk = self._from_dict(dict(row._mapping))
-            # 从embeddings表加载向量数据
-            vector_data = await self.embedding_repo.get_embedding(chunk.chunk_id)
-            if vector_data:
-                chunk.set_vector(vector_data)
+            chunk = self._from_row(row)
+            vector_data = row[8]  # embedding_data 位于 _CHUNK_SELECT_COLUMNS 之后
+            if vector_data is not None:
+                chunk.set_vector(self.embedding_repo.parse_vector(vector_data))
             chunks.append(chunk)
         
         return chunks
     
     async def search_similar(self, query: SearchQuery) -> List[SearchResult]:
-        """向量相似度搜索"""
+        """
+        向量相似度搜索
+        开启 CHUNK_HYBRID_SEARCH 时同时执行关键词搜索，两路结果按倒数排名融合（RRF）合并，
+        score 为融合得分而非余弦相似度；关键词检索占用连接池中的另一个连接，
+        且看不到当前会话尚未提交的分块
+        """
         if not query.vector:
             # 如果没有向量，回退到内容搜索
             return await self.search_by_content(query)
         
-        # 使用embedding仓储进行向量相似度搜索
-        search_results_data = await self.embedding_repo.vector_similarity_search(
+        limit = query.limit or 10
+        vector_search = self.embedding_repo.vector_similarity_search(
             query_vector=query.vector,
             knowledge_base_id=query.knowledge_base_id,
-            limit=query.limit or 10,
+            limit=limit,
             similarity_threshold=0.0
         )
         
-        # 转换为SearchResult对象
-        search_results = []
-        for data in search_results_data:
-            search_result = SearchResult(
+        if _HYBRID_SEARCH and query.get_clean_text():
+            search_results_data, keyword_results = await asyncio.gather(
+                vector_search, self._search_by_content_concurrently(query)
+            )
+        else:
+            search_results_data, keyword_results = await vector_search, None
+        
+        vector_results = [
+            SearchResult(
                 chunk_id=data['chunk_id'],
                 content=data['content'],
                 score=data['similarity_score'],
@@ -257,34 +398,92 @@ class DocumentChunkRepositoryImpl(DocumentChunkRepository):
                 chunk_index=data['chunk_index'],
                 metadata=data['metadata']
             )
-            search_results.append(search_result)
+            for data in search_results_data
+        ]
+        if keyword_results is None:
+            return vector_results
         
-        return search_results
+        # 余弦相似度与trigram相似度量纲不同，不能直接比较，按各自排名融合
+        fused: Dict[str, float] = {}
+        results: Dict[str, SearchResult] = {}
+        for ranked in (vector_results, keyword_results):
+            for rank, result in enumerate(ranked, 1):
+                fused[result.chunk_id] = fused.get(result.chunk_id, 0.0) + 1.0 / (_RRF_K + rank)
+                results.setdefault(result.chunk_id, result)
+        
+        ranked_ids = sorted(fused, key=fused.__getitem__, reverse=True)[:limit]
+        return [replace(results[chunk_id], score=fused[chunk_id]) for chunk_id in ranked_ids]
+    
+    async def _search_by_content_concurrently(self, query: SearchQuery) -> List[SearchResult]:
+        """在独立会话中执行关键词搜索（AsyncSession不允许同一会话上并发执行语句）"""
+        async with AsyncSessionLocal() as session:
+            return await DocumentChunkRepositoryImpl(session).search_by_content(query)
+    
+    async def _insert_values(self, chunks: List[DocumentChunk], now: datetime) -> None:
+        """以多行 VALUES 的 INSERT 写入分块，并回填数据库返回的ID"""
+        columns = ', '.join(_CHUNK_COLUMNS)
+        for start in range(0, len(chunks), _INSERT_BATCH_SIZE):
+            batch = chunks[start:start + _INSERT_BATCH_SIZE]
+            
+            # 构建 (:id_0, ...), (:id_1, ...) 形式的VALUES子句和扁平参数字典
+            values_clause = ', '.join(
+                '(' + ', '.join(f':{column}_{i}' for column in _CHUNK_COLUMNS) + ')'
+                for i in range(len(batch))
+            )
+            params: Dict[str, Any] = {}
+            for i, chunk in enumerate(batch):
+                for column, value in self._to_params(chunk, now).items():
+                    params[f'{column}_{i}'] = value
+            
+            sql = f"INSERT INTO chunks ({columns}) VALUES {values_clause} RETURNING id"
+            result = await self.session.execute(text(sql), params)
+            for chunk, row in zip(batch, result.fetchall()):
+                chunk.chunk_id = str(row[0])
+    
+    def _embedding_params(self, chunk: DocumentChunk) -> Dict[str, Any]:
+        """构建 _EMBEDDING_UPSERT_FROM_CTE 所需的绑定参数"""
+        return {
+            'embedding_id': uuid_generator.generate(),
+            'embedding_data': list(chunk.vector),
+            'embedding_model_id': 'default',  # 可以从chunk的metadata中获取
+            'version': 1,
+        }
     
-    def _from_dict(self, data: Dict[str, Any]) -> DocumentChunk:
-        """从旧表字典转换为文档块实体"""
-        # 处理meta字段，可能是JSON字符串也可能是字典
-        meta_data = data.get('meta')
-        if isinstance(meta_data, str):
-            try:
-                meta_data = json.loads(meta_data)
-            except json.JSONDecodeError:
-                meta_data = {}
-        elif not isinstance(meta_data, dict):
-            meta_data = {}
+    def _to_params(self, chunk: DocumentChunk, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """将文档块实体转换为 chunks 表插入参数（缺少ID时生成UUID）"""
+        if not chunk.chunk_id:
+            chunk.chunk_id = uuid_generator.generate()
         
-        chunk = DocumentChunk(
-            chunk_id=str(data.get('id', '')),
-            content=data['content'],
-            chunk_index=data.get('index_in_doc', 0),
+        return {
+            'id': chunk.chunk_id,
+            'document_id': chunk.document_id,
+            'dataset_id': chunk.knowledge_base_id,
+            'content': chunk.content,
+            'char_size': chunk.char_size,
+            'index_in_doc': chunk.chunk_index,
+            'meta': chunk.get_metadata_json(),
+            'is_active': True,
+            'created_at': chunk.created_at or now or datetime.now(),
+        }
+    
+    def _from_row(self, row: Sequence[Any]) -> DocumentChunk:
+        """从chunks表行（列顺序见 _CHUNK_SELECT_COLUMNS）转换为文档块实体，数据库行可信，跳过 __post_init__ 校验"""
+        chunk_id, document_id, dataset_id, content, char_size, index_in_doc, meta, created_at = row[:8]
+        chunk = DocumentChunk.__new__(DocumentChunk)
+        chunk.__dict__.update(
+            content=content,
+            chunk_index=index_in_doc or 0,
             start_offset=0,
-            end_offset=data.get('char_size', 0),
-            document_id=str(data['document_id']),
-            knowledge_base_id=str(data['dataset_id']),
+            document_id=str(document_id),
+            knowledge_base_id=str(dataset_id),
+            chunk_id=str(chunk_id),
+            end_offset=char_size or 0,
+            content_hash=None,
             vector=None,  # 向量数据将从embeddings表单独加载
-            metadata=meta_data,
-            created_at=data.get('created_at'),
-            updated_at=data.get('created_at')
+            metadata=_decode_meta(meta),
+            created_at=created_at,
+            updated_at=created_at,
+            is_indexed=False,
         )
         
-        return chunk
\ No newline at end of file
+        return chunk
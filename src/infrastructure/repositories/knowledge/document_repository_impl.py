@@ -9,8 +9,77 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....domain.knowledge.entities.document import Document
 from ....domain.knowledge.repositories.document_repository import DocumentRepository
+from ....infrastructure.database import copy_records_to_table, estimate_row_count
 from ....infrastructure.utils.uuid_generator import uuid_generator
 
+# documents表插入列（与 _to_params 返回的键保持一致）
+_DOCUMENT_COLUMNS = (
+    'id', 'dataset_id', 'name', 'original_document_id', 'hash', 'char_size',
+    'meta', 'process_status', 'is_active', 'created_at', 'updated_at',
+)
+
+# 达到该行数时改用COPY协议写入
+_COPY_THRESHOLD = 100
+
+# 固定文本的语句在模块加载时构建一次，命中SQLAlchemy编译缓存和asyncpg预编译语句缓存
+_INSERT_SQL = text("""
+INSERT INTO documents (id, dataset_id, name, original_document_id, hash, char_size, meta, process_status, is_active, created_at, updated_at)
+VALUES (:id, :dataset_id, :name, :original_document_id, :hash, :char_size, :meta, :process_status, :is_active, :created_at, :updated_at)
+RETURNING id
+""")
+_FIND_BY_ID_SQL = text("""
+SELECT * FROM documents
+WHERE id = :id AND is_active = true
+""")
+_FIND_BY_KNOWLEDGE_BASE_SQL = text("""
+SELECT * FROM documents
+WHERE dataset_id = :dataset_id AND is_active = true
+ORDER BY created_at DESC
+""")
+_UPDATE_SQL = text("""
+UPDATE documents
+SET name = :name,
+    hash = :hash,
+    char_size = :char_size,
+    meta = :meta,
+    process_status = :process_status,
+    updated_at = :updated_at
+WHERE id = :id
+""")
+_DELETE_BY_ID_SQL = text("""
+DELETE FROM documents
+WHERE id = :id
+""")
+_DEACTIVATE_BY_KNOWLEDGE_BASE_SQL = text("""
+UPDATE documents
+SET is_active = false, updated_at = :updated_at
+WHERE dataset_id = :dataset_id AND is_active = true
+""")
+_COUNT_BY_KNOWLEDGE_BASE_SQL = text("""
+SELECT COUNT(*) FROM documents
+WHERE dataset_id = :dataset_id AND is_active = true
+""")
+_FIND_UNPROCESSED_SQL = text("""
+SELECT * FROM documents
+WHERE dataset_id = :dataset_id
+    AND process_status = 'pending'
+    AND is_active = true
+ORDER BY created_at ASC
+""")
+_FIND_BY_CONTENT_HASH_SQL = text("""
+SELECT * FROM documents
+WHERE hash = :hash
+    AND dataset_id = :dataset_id
+    AND is_active = true
+""")
+_FIND_BY_FILENAME_PATTERN_SQL = text("""
+SELECT * FROM documents
+WHERE dataset_id = :dataset_id
+    AND name LIKE :pattern
+    AND is_active = true
+ORDER BY created_at DESC
+""")
+
 
 class DocumentRepositoryImpl(DocumentRepository):
     """文档仓储SQL实现"""
@@ -20,33 +89,8 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def save(self, document: Document) -> Document:
         """保存文档"""
-        # 如果document没有ID，生成一个UUID
-        if not document.document_id:
-            document.document_id = uuid_generator.generate()
-        
         # 使用实际数据库表字段
-        sql = """
-        INSERT INTO documents (id, dataset_id, name, original_document_id, hash, char_size, meta, process_status, is_active, created_at, updated_at)
-        VALUES (:id, :dataset_id, :name, :original_document_id, :hash, :char_size, :meta, :process_status, :is_active, :created_at, :updated_at)
-        RETURNING id
-        """
-        
-        # 转换字段名映射
-        params = {
-            'id': document.document_id,
-            'dataset_id': document.knowledge_base_id if document.knowledge_base_id else None,
-            'name': document.filename,
-            'original_document_id': document.document_id,  # 这里可能需要区分，暂时使用相同值
-            'hash': document.content_hash,
-            'char_size': document.file_size,
-            'meta': json.dumps(document.metadata),
-            'process_status': 'completed' if document.is_processed else 'pending',
-            'is_active': True,
-            'created_at': document.created_at,
-            'updated_at': document.updated_at
-        }
-        
-        result = await self.session.execute(text(sql), params)
+        result = await self.session.execute(_INSERT_SQL, self._to_params(document))
         new_id = result.scalar()
         
         # 更新实体的ID
@@ -56,24 +100,43 @@ class DocumentRepositoryImpl(DocumentRepository):
         return document
     
     async def save_batch(self, documents: List[Document]) -> List[Document]:
-        """批量保存文档"""
+        """批量保存文档（大批量走COPY，否则每批一条多行 VALUES 的 INSERT）"""
         if not documents:
             return []
+        if len(documents) < 2:
+            return [await self.save(documents[0])]
         
-        # 转换为数据库模型列表
-        for doc in documents:
-            await self.save(doc)
+        # 为缺少ID的记录一次性预分配UUID
+        missing = [doc for doc in documents if not doc.document_id]
+        for doc, new_id in zip(missing, uuid_generator.generate_batch(len(missing))):
+            doc.document_id = new_id
+        
+        params_list = [self._to_params(doc) for doc in documents]
+        if len(documents) >= _COPY_THRESHOLD:
+            records = [tuple(params[column] for column in _DOCUMENT_COLUMNS) for params in params_list]
+            await copy_records_to_table(self.session, 'documents', _DOCUMENT_COLUMNS, records)
+            return documents
+        
+        # 构建 (:id_0, ...), (:id_1, ...) 形式的VALUES子句和扁平参数字典
+        values_clause = ', '.join(
+            '(' + ', '.join(f':{column}_{i}' for column in _DOCUMENT_COLUMNS) + ')'
+            for i in range(len(documents))
+        )
+        params: Dict[str, Any] = {}
+        for i, doc_params in enumerate(params_list):
+            for column, value in doc_params.items():
+                params[f'{column}_{i}'] = value
+        
+        sql = f"INSERT INTO documents ({', '.join(_DOCUMENT_COLUMNS)}) VALUES {values_clause} RETURNING id"
+        result = await self.session.execute(text(sql), params)
+        for doc, row in zip(documents, result.fetchall()):
+            doc.document_id = str(row[0])
         
         return documents
     
     async def find_by_id(self, document_id: str) -> Optional[Document]:
         """根据ID查找文档"""
-        sql = """
-        SELECT * FROM documents 
-        WHERE id = :id AND is_active = true
-        """
-        
-        result = await self.session.execute(text(sql), {"id": document_id})
+        result = await self.session.execute(_FIND_BY_ID_SQL, {"id": document_id})
         row = result.fetchone()
         
         if row:
@@ -82,13 +145,7 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def find_by_knowledge_base_id(self, knowledge_base_id: str) -> List[Document]:
         """根据知识库ID查找文档列表"""
-        sql = """
-        SELECT * FROM documents 
-        WHERE dataset_id = :dataset_id AND is_active = true
-        ORDER BY created_at DESC
-        """
-        
-        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id})
+        result = await self.session.execute(_FIND_BY_KNOWLEDGE_BASE_SQL, {"dataset_id": knowledge_base_id})
         rows = result.fetchall()
         
         return [self._from_dict(dict(row._mapping)) for row in rows]
@@ -100,17 +157,6 @@ class DocumentRepositoryImpl(DocumentRepository):
         
         document.updated_at = datetime.now()
         
-        sql = """
-        UPDATE documents 
-        SET name = :name,
-            hash = :hash,
-            char_size = :char_size,
-            meta = :meta,
-            process_status = :process_status,
-            updated_at = :updated_at
-        WHERE id = :id
-        """
-        
         params = {
             'id': document.document_id,
             'name': document.filename,
@@ -121,17 +167,12 @@ class DocumentRepositoryImpl(DocumentRepository):
             'updated_at': document.updated_at
         }
         
-        await self.session.execute(text(sql), params)
+        await self.session.execute(_UPDATE_SQL, params)
         return document
     
     async def delete_by_id(self, document_id: str) -> bool:
         """根据ID删除文档（硬删除）"""
-        sql = """
-        DELETE FROM documents 
-        WHERE id = :id
-        """
-        
-        result = await self.session.execute(text(sql), {
+        result = await self.session.execute(_DELETE_BY_ID_SQL, {
             "id": document_id
         })
         # 注意：事务提交由调用方处理，不在这里提交
@@ -139,13 +180,7 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def delete_by_knowledge_base_id(self, knowledge_base_id: str) -> int:
         """根据知识库ID删除所有文档（软删除），返回删除数量"""
-        sql = """
-        UPDATE documents 
-        SET is_active = false, updated_at = :updated_at
-        WHERE dataset_id = :dataset_id AND is_active = true
-        """
-        
-        result = await self.session.execute(text(sql), {
+        result = await self.session.execute(_DEACTIVATE_BY_KNOWLEDGE_BASE_SQL, {
             "dataset_id": knowledge_base_id,
             "updated_at": datetime.now()
         })
@@ -154,25 +189,17 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def count_by_knowledge_base_id(self, knowledge_base_id: str) -> int:
         """统计知识库中的文档数量"""
-        sql = """
-        SELECT COUNT(*) FROM documents
-        WHERE dataset_id = :dataset_id AND is_active = true
-        """
-        
-        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id})
+        result = await self.session.execute(_COUNT_BY_KNOWLEDGE_BASE_SQL, {"dataset_id": knowledge_base_id})
         return result.scalar() or 0
     
+    async def count_estimate(self, knowledge_base_id: str) -> int:
+        """估算知识库中的文档数量（规划器行数估计，避免COUNT(*)扫描）"""
+        sql = "SELECT 1 FROM documents WHERE dataset_id = :dataset_id AND is_active = true"
+        return await estimate_row_count(self.session, sql, {"dataset_id": knowledge_base_id})
+    
     async def find_unprocessed_documents(self, knowledge_base_id: str) -> List[Document]:
         """查找未处理的文档"""
-        sql = """
-        SELECT * FROM documents 
-        WHERE dataset_id = :dataset_id 
-            AND process_status = 'pending' 
-            AND is_active = true
-        ORDER BY created_at ASC
-        """
-        
-        result = await self.session.execute(text(sql), {"dataset_id": knowledge_base_id})
+        result = await self.session.execute(_FIND_UNPROCESSED_SQL, {"dataset_id": knowledge_base_id})
         rows = result.fetchall()
         
         return [self._from_dict(dict(row._mapping)) for row in rows]
@@ -183,14 +210,7 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def find_by_content_hash(self, content_hash: str, knowledge_base_id: str) -> Optional[Document]:
         """根据内容哈希查找文档（用于去重）"""
-        sql = """
-        SELECT * FROM documents
-        WHERE hash = :hash 
-            AND dataset_id = :dataset_id 
-            AND is_active = true
-        """
-        
-        result = await self.session.execute(text(sql), {
+        result = await self.session.execute(_FIND_BY_CONTENT_HASH_SQL, {
             "hash": content_hash,
             "dataset_id": knowledge_base_id
         })
@@ -202,15 +222,7 @@ class DocumentRepositoryImpl(DocumentRepository):
     
     async def find_by_filename_pattern(self, knowledge_base_id: str, pattern: str) -> List[Document]:
         """根据文件名模式查找文档"""
-        sql = """
-        SELECT * FROM documents
-        WHERE dataset_id = :dataset_id 
-            AND name LIKE :pattern 
-            AND is_active = true
-        ORDER BY created_at DESC
-        """
-        
-        result = await self.session.execute(text(sql), {
+        result = await self.session.execute(_FIND_BY_FILENAME_PATTERN_SQL, {
             "dataset_id": knowledge_base_id,
             "pattern": f"%{pattern}%"
         })
@@ -219,6 +231,26 @@ class DocumentRepositoryImpl(DocumentRepository):
         return [self._from_dict(dict(row._mapping)) for row in rows]
     
 
+    def _to_params(self, document: Document) -> Dict[str, Any]:
+        """将文档实体转换为 documents 表插入参数（缺少ID时生成UUID）"""
+        if not document.document_id:
+            document.document_id = uuid_generator.generate()
+        
+        # 转换字段名映射
+        return {
+            'id': document.document_id,
+            'dataset_id': document.knowledge_base_id if document.knowledge_base_id else None,
+            'name': document.filename,
+            'original_document_id': document.document_id,  # 这里可能需要区分，暂时使用相同值
+            'hash': document.content_hash,
+            'char_size': document.file_size,
+            'meta': json.dumps(document.metadata),
+            'process_status': 'completed' if document.is_processed else 'pending',
+            'is_active': True,
+            'created_at': document.created_at,
+            'updated_at': document.updated_at
+        }
+    
     def _from_dict(self, data: Dict[str, Any]) -> Document:
         """从字典转换为文档实体"""
         # 处理meta字段，可能是JSON字符串也可能是字典
@@ -1,28 +1,115 @@
 """
 基础设施层 - Embedding配置仓储实现
 """
+import asyncio
 import logging
+import os
+from types import MappingProxyType
 from typing import Optional
+from sqlalchemy import and_, bindparam, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from ....domain.knowledge.repositories.embedding_config_repository import EmbeddingConfigRepository
 from ....domain.knowledge.vo.embedding_config import EmbeddingModelConfig
-from ....infrastructure.repositories.model.model_repository_impl import ModelRepositoryImpl
-from ....infrastructure.repositories.provider.provider_repository_impl import ProviderRepositoryImpl
+from ....domain.provider.exceptions import RepositoryError
+from ....domain.provider.value_objects.base_url import BaseUrl
+from ....infrastructure.cache import RedisCache, get_redis_cache
 from ....infrastructure.models.knowledge_models import DatasetModel
+from ....infrastructure.models.provider_models import ProviderModel, ModelModel
 from ....infrastructure.security.encryption import encryption_service
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# 各提供商的默认Base URL（只读常量，避免每次调用重建字典）
+_PROVIDER_URLS = MappingProxyType({
+    'openai': 'https://api.openai.com/v1',
+    'siliconflow': 'https://api.siliconflow.cn/v1',
+    'deepseek': 'https://api.deepseek.com/v1',
+    'anthropic': 'https://api.anthropic.com',
+    'local': 'http://localhost:8000'
+})
+_DEFAULT_BASE_URL = 'https://api.siliconflow.cn/v1'
+
+# 知识库embedding配置中用到的字段，由数据库按JSON路径提取，不再把整个JSONB文档取回Python解析
+_EMBEDDING_MODEL_NAME = DatasetModel.embedding_model_config['embedding']['model_name'].as_string()
+
+# 知识库配置中的模型名称 -> 模型所属提供商 -> 该用户的提供商配置（后两者外连接，缺失时为NULL）
+# 语句在模块加载时构建一次，每次调用只绑定参数，直接命中SQLAlchemy编译缓存；归属校验在数据库完成。
+# 同名模型可能属于多个提供商：优先取用户已配置凭证的提供商，其次取最近同步的模型，结果确定
+_EMBEDDING_CONFIG_STMT = (
+    select(
+        _EMBEDDING_MODEL_NAME.label('model_name'),
+        DatasetModel.embedding_model_config['embedding']['strategy'].as_string().label('strategy'),
+        DatasetModel.embedding_model_config['batch_size'].as_integer().label('batch_size'),
+        DatasetModel.embedding_model_config['max_tokens'].as_integer().label('max_tokens'),
+        DatasetModel.embedding_model_config['timeout'].as_integer().label('timeout'),
+        ModelModel.provider_name,
+        ProviderModel.api_key,
+        ProviderModel.base_url,
+    )
+    .select_from(DatasetModel)
+    .join(
+        ModelModel,
+        ModelModel.model_name == _EMBEDDING_MODEL_NAME,
+        isouter=True
+    )
+    .join(
+        ProviderModel,
+        and_(
+            ProviderModel.provider == func.lower(ModelModel.provider_name),
+            ProviderModel.user_id == DatasetModel.user_id,
+            ProviderModel.is_delete == 0,
+        ),
+        isouter=True
+    )
+    .where(
+        DatasetModel.id == bindparam("knowledge_base_id"),
+        DatasetModel.user_id == bindparam("user_id"),
+        DatasetModel.is_deleted == False
+    )
+    .order_by(
+        ProviderModel.api_key.is_(None),
+        ModelModel.updated_at.desc().nulls_last(),
+        ModelModel.provider_name
+    )
+    .limit(1)
+)
+
+# 默认embedding提供商及模型（知识库未配置embedding模型时的兜底）
+_DEFAULT_PROVIDER = 'siliconflow'
+_DEFAULT_MODEL_NAME = 'BAAI/bge-large-zh-v1.5'
+
+# 兜底凭证只取系统用户名下的默认提供商配置，绝不使用其他租户的API Key
+_SYSTEM_USER_ID = os.getenv("SYSTEM_USER_ID", "system")
+
+# 命中 providers(user_id, provider, is_delete) 索引
+_DEFAULT_PROVIDER_STMT = (
+    select(ProviderModel.api_key, ProviderModel.base_url)
+    .where(
+        ProviderModel.user_id == bindparam("system_user_id"),
+        ProviderModel.provider == bindparam("provider"),
+        ProviderModel.is_delete == 0
+    )
+    .limit(1)
+)
+
+# 知识库embedding配置缓存的过期时间（秒）；知识库或提供商变更时在事务提交后主动删除
+EMBEDDING_CONFIG_CACHE_TTL = 300
+
+
+def embedding_config_cache_key(knowledge_base_id: str, user_id: str) -> str:
+    """知识库embedding配置的缓存键（按用户隔离，避免跨租户读取）"""
+    return f"embcfg:{knowledge_base_id}:{user_id}"
 
 
 class EmbeddingConfigRepositoryImpl(EmbeddingConfigRepository):
     """Embedding配置仓储实现"""
     
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: Optional[RedisCache] = None):
         self.session = session
-        self.model_repo = ModelRepositoryImpl(session)
-        self.provider_repo = ProviderRepositoryImpl(session)
+        self.cache = cache or get_redis_cache()
     
     async def get_embedding_config_by_knowledge_base_id(
         self, 
@@ -31,129 +118,147 @@ class EmbeddingConfigRepositoryImpl(EmbeddingConfigRepository):
     ) -> Optional[EmbeddingModelConfig]:
         """
         根据知识库ID获取embedding配置
+        优先读取Redis缓存；未命中时知识库配置、模型所属提供商、该用户的提供商凭证通过一次JOIN查询取回
+        """
+        cache_key = embedding_config_cache_key(knowledge_base_id, user_id)
+        cached = await self.cache.get_json(cache_key)
+        if cached is not None:
+            # 缓存中的API Key保持加密存储
+            if cached.get('api_key'):
+                cached['api_key'] = await self._decrypt_api_key(cached['provider'], cached['api_key'])
+            return EmbeddingModelConfig.from_dict(cached)
+        
+        config = await self._load_embedding_config(knowledge_base_id, user_id)
+        if config is not None:
+            cached = config.to_dict()
+            if config.api_key:
+                cached['api_key'] = await asyncio.to_thread(encryption_service.encrypt, config.api_key)
+            await self.cache.set_json(cache_key, cached, EMBEDDING_CONFIG_CACHE_TTL)
+        return config
+    
+    async def _load_embedding_config(
+        self, 
+        knowledge_base_id: str,
+        user_id: str
+    ) -> Optional[EmbeddingModelConfig]:
+        """
+        从数据库加载知识库的embedding配置（一次JOIN查询）
+        
+        Raises:
+            RepositoryError: 数据库查询失败
         """
+        logger.debug("🔍 开始查询embedding配置: knowledge_base_id=%s, user_id=%s", knowledge_base_id, user_id)
+        
         try:
-            logging.info(f"🔍 开始查询embedding配置: knowledge_base_id={knowledge_base_id}, user_id={user_id}")
-            
-            # 1. 从数据库获取知识库的embedding配置
-            stmt = select(DatasetModel.embedding_model_id, DatasetModel.embedding_model_config, DatasetModel.user_id).where(
-                DatasetModel.id == knowledge_base_id,
-                DatasetModel.is_deleted == False,
-                DatasetModel.user_id == user_id
+            result = await self.session.execute(
+                _EMBEDDING_CONFIG_STMT, {"knowledge_base_id": knowledge_base_id, "user_id": user_id}
             )
-            result = await self.session.execute(stmt)
-            row = result.first()
-            
-            logging.info(f"📊 数据库查询结果: row={row}")
-            
-            if not row:
-                logging.debug(f"❌ 未找到知识库记录: knowledge_base_id={knowledge_base_id}")
-                return None
-            
-            embedding_model_config = row.embedding_model_config
-            embedding_config = embedding_model_config.get('embedding', {})
-            if embedding_config is None:
-                logging.error(f"❌ embedding_model_config中没有embedding配置")
-                return None
-            
-            # 2. 处理embedding配置
-            if embedding_config.get('model_name') is not None:
-                
-                model_name = embedding_config.get('model_name')
-                strategy = embedding_config.get('strategy')
-                
-                logging.info(f"📋 使用配置文件中的embedding设置: model_name={model_name}, strategy={strategy}")
-                
-                # 根据模型名称去查提供商
-                provider = self._get_provider_name_by_model_name(model_name)
-                if provider is None:
-                    logging.error(f"❌ 未找到模型的提供商: model_name={model_name}")
-                    return None
-
-                # 从数据库获取该用户的提供商配置
-                api_key, base_url = await self._get_provider_config_from_db(provider, user_id)
-                
-                # 构建配置对象
-                config = EmbeddingModelConfig(
-                    model_id=0,  # 使用0表示配置文件中的模型
-                    model_name=model_name,
-                    provider=provider,
-                    api_key=api_key,
-                    base_url=base_url or self._get_default_base_url(provider),
-                    strategy=strategy,
-                    batch_size=embedding_model_config.get('batch_size', 32),
-                    max_tokens=embedding_model_config.get('max_tokens', 8192),
-                    timeout=embedding_model_config.get('timeout', 30),
-                )
-                
-                logging.info(f"✅ 成功构建embedding配置: {config.model_name} ({config.provider})")
-                return config
-            
-        except Exception as e:
-            logging.error(f"获取embedding配置失败: {str(e)}")
+        except SQLAlchemyError as e:
+            raise RepositoryError(f"查询embedding配置失败: {str(e)}")
+        row = result.tuples().first()
+        
+        logger.debug("📊 数据库查询结果: found=%s", row is not None)
+        
+        if not row:
+            logger.debug("❌ 未找到知识库记录: knowledge_base_id=%s", knowledge_base_id)
+            return None
+        
+        (
+            model_name, strategy, batch_size, max_tokens, timeout,
+            provider_name, encrypted_api_key, raw_base_url
+        ) = row
+        if model_name is None:
+            logger.error("❌ embedding_model_config中没有embedding配置")
+            return None
+        
+        logger.debug("📋 使用配置文件中的embedding设置: model_name=%s, strategy=%s", model_name, strategy)
+        
+        provider = provider_name
+        if provider is None:
+            logger.error("❌ 未找到模型的提供商: model_name=%s", model_name)
             return None
+        
+        api_key = await self._decrypt_api_key(provider, encrypted_api_key)
+        base_url_vo = BaseUrl.from_string(raw_base_url)
+        base_url = base_url_vo.value if not base_url_vo.is_empty() else None
+        
+        # 构建配置对象
+        config = EmbeddingModelConfig(
+            model_id=0,  # 使用0表示配置文件中的模型
+            model_name=model_name,
+            provider=provider,
+            api_key=api_key,
+            base_url=base_url or self._get_default_base_url(provider),
+            strategy=strategy,
+            batch_size=32 if batch_size is None else batch_size,
+            max_tokens=8192 if max_tokens is None else max_tokens,
+            timeout=30 if timeout is None else timeout,
+        )
+        
+        logger.debug("✅ 成功构建embedding配置: %s (%s)", config.model_name, config.provider)
+        return config
     
-    def _get_default_base_url(self, provider: str) -> str:
+    async def get_default_embedding_config(self) -> EmbeddingModelConfig:
         """
-        获取提供商的默认Base URL
+        获取默认embedding配置
+        只使用系统用户（SYSTEM_USER_ID）名下的默认提供商凭证；未配置时返回不带API Key的配置，由调用方校验
         """
-        provider_urls = {
-            'openai': 'https://api.openai.com/v1',
-            'siliconflow': 'https://api.siliconflow.cn/v1',
-            'deepseek': 'https://api.deepseek.com/v1',
-            'anthropic': 'https://api.anthropic.com',
-            'local': 'http://localhost:8000'
-        }
-        return provider_urls.get(provider, 'https://api.siliconflow.cn/v1')
+        try:
+            result = await self.session.execute(
+                _DEFAULT_PROVIDER_STMT,
+                {"system_user_id": _SYSTEM_USER_ID, "provider": _DEFAULT_PROVIDER}
+            )
+        except SQLAlchemyError as e:
+            raise RepositoryError(f"查询默认embedding提供商失败: {str(e)}")
+        
+        api_key = None
+        base_url = None
+        row = result.tuples().first()
+        if row is not None:
+            encrypted_api_key, raw_base_url = row
+            api_key = await self._decrypt_api_key(_DEFAULT_PROVIDER, encrypted_api_key)
+            base_url_vo = BaseUrl.from_string(raw_base_url)
+            base_url = base_url_vo.value if not base_url_vo.is_empty() else None
+        
+        return EmbeddingModelConfig(
+            model_id=0,
+            model_name=_DEFAULT_MODEL_NAME,
+            provider=_DEFAULT_PROVIDER,
+            api_key=api_key,
+            base_url=base_url or self._get_default_base_url(_DEFAULT_PROVIDER),
+        )
     
-    async def _get_provider_name_by_model_name(self, model_name: str) -> str:
+    def _get_default_base_url(self, provider: str) -> str:
         """
-        根据模型名称获取提供商名称
+        获取提供商的默认Base URL
         """
-        try:
-            provider_name = await self.model_repo.find_provider_name_by_model_name(model_name)
-            return provider_name
-        except Exception as e:
-            print(f"❌ 根据模型名称获取提供商名称失败: {str(e)}")
-            return None
-        
-
-    async def _get_provider_config_from_db(self, provider: str, user_id: str) -> tuple[Optional[str], Optional[str]]:
+        return _PROVIDER_URLS.get(provider, _DEFAULT_BASE_URL)
+    
+    async def _decrypt_api_key(self, provider: str, encrypted_api_key: Optional[str]) -> Optional[str]:
         """
-        从数据库获取提供商配置
+        解密提供商的API Key
+        API Key解密是CPU操作，放到线程池执行以免阻塞事件循环
         
         Args:
             provider: 提供商名称
-            user_id: 用户ID
+            encrypted_api_key: 数据库中加密存储的API Key（用户未配置该提供商时为None）
             
         Returns:
-            tuple[api_key, base_url]: API Key和Base URL
+            解密后的API Key，未配置或解密失败时为None
         """
+        if not encrypted_api_key:
+            logger.warning("⚠️  %s 提供商没有配置API Key", provider)
+            return None
+        
+        # 解密缓存命中时直接返回，只有未命中才提交到线程池
+        decrypted_api_key = encryption_service.get_cached_plaintext(encrypted_api_key)
+        if decrypted_api_key is not None:
+            return decrypted_api_key
+        
         try:
-            # 查找该用户的指定提供商配置
-            provider_entity = await self.provider_repo.find_by_user_and_provider(user_id, provider)
-            
-            if not provider_entity:
-                print(f"⚠️  用户 {user_id} 没有配置 {provider} 提供商")
-                return None, None
-            
-            # 解密API Key
-            decrypted_api_key = None
-            if provider_entity.api_key and provider_entity.api_key.encrypted_value:
-                try:
-                    decrypted_api_key = encryption_service.decrypt(provider_entity.api_key.encrypted_value)
-                    print(f"✅ 从数据库获取到 {provider} 的API Key")
-                except Exception as e:
-                    print(f"❌ 解密 {provider} API Key失败: {str(e)}")
-                    decrypted_api_key = None
-            else:
-                print(f"⚠️  {provider} 提供商没有配置API Key")
-            
-            # 获取Base URL
-            base_url = provider_entity.base_url.value if provider_entity.base_url and not provider_entity.base_url.is_empty() else None
-            
-            return decrypted_api_key, base_url
-            
+            decrypted_api_key = await asyncio.to_thread(encryption_service.decrypt, encrypted_api_key)
+            logger.debug("✅ 从数据库获取到 %s 的API Key", provider)
+            return decrypted_api_key
         except Exception as e:
-            print(f"❌ 从数据库获取 {provider} 配置失败: {str(e)}")
-            return None, None
\ No newline at end of file
+            logger.error("❌ 解密 %s API Key失败: %s", provider, e)
+            return None
@@ -2,16 +2,209 @@
 基础设施层 - Embedding向量仓储实现
 处理embeddings表中的vector类型数据
 """
+import logging
+import os
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.future import select
 import json
 
+# 可选使用numpy的C解析器解析向量文本（比逐个float()快一个数量级），未安装时回退到纯Python解析
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ....infrastructure.database import copy_text_rows_to_table
 from ....infrastructure.models.knowledge_models import EmbeddingModel
 from ....domain.knowledge.entities.document_chunk import DocumentChunk
 from ....infrastructure.utils.uuid_generator import uuid_generator
 
+logger = logging.getLogger(__name__)
+
+# 每条UNNEST UPSERT携带的最大行数
+_UPSERT_BATCH_SIZE = 1000
+
+# embeddings表COPY写入列
+_EMBEDDING_COPY_COLUMNS = ('id', 'chunk_id', 'embedding_data', 'embedding_model_id', 'version')
+
+# IVFFlat索引默认探测的聚类数
+_IVFFLAT_PROBES = 10
+
+# HNSW索引默认的搜索候选列表大小
+_HNSW_EF_SEARCH = 40
+
+# 向量维度
+EMBEDDING_DIMENSION = 1024
+
+# 向量存储类型：vector（float32）或 halfvec（float16，需先执行 sql/embeddings_halfvec_migration.sql）
+EMBEDDING_VECTOR_TYPE = os.getenv("EMBEDDING_VECTOR_TYPE", "vector")
+if EMBEDDING_VECTOR_TYPE not in ("vector", "halfvec"):
+    raise ValueError(f"不支持的向量存储类型: {EMBEDDING_VECTOR_TYPE}")
+
+# 向量索引类型：
+#   ivfflat       - sql/embeddings_ivfflat_index.sql
+#   hnsw          - sql/embeddings_hnsw_index.sql
+#   halfvec_hnsw  - sql/embeddings_halfvec_index.sql，vector存储 + halfvec表达式HNSW索引，检索时两阶段精排
+# halfvec迁移只创建HNSW索引，此时总是按hnsw调参
+EMBEDDING_INDEX_TYPE = "hnsw" if EMBEDDING_VECTOR_TYPE == "halfvec" else os.getenv("EMBEDDING_INDEX_TYPE", "ivfflat")
+if EMBEDDING_INDEX_TYPE not in ("ivfflat", "hnsw", "halfvec_hnsw"):
+    raise ValueError(f"不支持的向量索引类型: {EMBEDDING_INDEX_TYPE}")
+
+def _column_sql_type(column_name: str) -> str:
+    """embeddings表列的PostgreSQL类型名（取自ORM模型，用于数组参数的显式类型转换）"""
+    return EmbeddingModel.__table__.c[column_name].type.compile(dialect=postgresql.dialect())
+
+
+# 批量UPSERT：每列一个数组参数，UNNEST展开成行。无论批次多大都只有5个绑定参数、同一条语句文本，
+# asyncpg以二进制数组传参，服务端只需解析一次、复用同一执行计划
+_EMBEDDING_UPSERT_SQL = text(f"""
+INSERT INTO embeddings (id, chunk_id, embedding_data, embedding_model_id, version)
+SELECT * FROM UNNEST(
+    CAST(:ids AS {_column_sql_type('id')}[]),
+    CAST(:chunk_ids AS {_column_sql_type('chunk_id')}[]),
+    CAST(:embedding_data AS {EMBEDDING_VECTOR_TYPE}[]),
+    CAST(:embedding_model_ids AS {_column_sql_type('embedding_model_id')}[]),
+    CAST(:versions AS {_column_sql_type('version')}[])
+)
+ON CONFLICT (chunk_id) DO UPDATE SET
+    embedding_data = EXCLUDED.embedding_data,
+    embedding_model_id = EXCLUDED.embedding_model_id,
+    version = EXCLUDED.version,
+    created_at = CURRENT_TIMESTAMP
+""")
+
+# 两阶段检索时粗排取 limit * 该倍数 的候选，再按余弦距离精排
+_BINARY_RERANK_FACTOR = 4
+
+# 两阶段检索：halfvec表达式索引（半精度，索引体积减半）粗排取候选，再按原始float32向量精排
+_HALFVEC_INDEX_RERANK_SEARCH_SQL = f"""
+WITH q AS (SELECT CAST(:query_vector AS vector) AS v),
+candidates AS (
+    SELECT e.chunk_id, e.embedding_data
+    FROM embeddings e
+    INNER JOIN chunks c ON c.id = e.chunk_id
+    WHERE c.dataset_id = :dataset_id 
+      AND c.is_active = true
+    ORDER BY e.embedding_data::halfvec({EMBEDDING_DIMENSION})
+        <=> (SELECT v FROM q)::halfvec({EMBEDDING_DIMENSION})
+    LIMIT :candidate_limit
+)
+SELECT 
+    c.id as chunk_id,
+    c.content,
+    c.document_id,
+    c.index_in_doc,
+    c.meta,
+    (1 - (candidates.embedding_data <=> (SELECT v FROM q))) as similarity_score
+FROM candidates
+INNER JOIN chunks c ON c.id = candidates.chunk_id
+ORDER BY similarity_score DESC
+LIMIT :limit
+"""
+
+# 使用余弦距离（<=> 操作符）排序，ORDER BY ... LIMIT 形式可走向量索引
+# 查询向量只在CTE q中绑定一次；以标量子查询 (SELECT v FROM q) 引用时规划器将其视为常量参数，
+# 仍可按索引顺序扫描（直接 JOIN q 后引用 q.v 则无法走索引）
+_VECTOR_SEARCH_SQL = """
+WITH q AS (SELECT CAST(:query_vector AS vector) AS v)
+SELECT 
+    c.id as chunk_id,
+    c.content,
+    c.document_id,
+    c.index_in_doc,
+    c.meta,
+    (1 - (e.embedding_data <=> (SELECT v FROM q))) as similarity_score
+FROM embeddings e
+INNER JOIN chunks c ON c.id = e.chunk_id
+WHERE c.dataset_id = :dataset_id 
+  AND c.is_active = true
+ORDER BY e.embedding_data <=> (SELECT v FROM q)
+LIMIT :limit
+"""
+
+# 两阶段检索：二值量化汉明距离（走bit索引）粗排取候选，再按halfvec余弦距离精排
+_HALFVEC_RERANK_SEARCH_SQL = f"""
+WITH q AS (SELECT CAST(:query_vector AS halfvec({EMBEDDING_DIMENSION})) AS v),
+candidates AS (
+    SELECT e.chunk_id, e.embedding_data
+    FROM embeddings e
+    INNER JOIN chunks c ON c.id = e.chunk_id
+    WHERE c.dataset_id = :dataset_id 
+      AND c.is_active = true
+    ORDER BY binary_quantize(e.embedding_data)::bit({EMBEDDING_DIMENSION})
+        <~> binary_quantize((SELECT v FROM q))
+    LIMIT :candidate_limit
+)
+SELECT 
+    c.id as chunk_id,
+    c.content,
+    c.document_id,
+    c.index_in_doc,
+    c.meta,
+    (1 - (candidates.embedding_data <=> (SELECT v FROM q))) as similarity_score
+FROM candidates
+INNER JOIN chunks c ON c.id = candidates.chunk_id
+ORDER BY similarity_score DESC
+LIMIT :limit
+"""
+
+# 相似度阈值放在外层查询过滤：内层保持纯 ORDER BY 距离 LIMIT 以便走向量索引，
+# 距离条件若写进内层WHERE，规划器无法使用索引顺序扫描
+_THRESHOLD_FILTER_SQL = """
+SELECT * FROM ({inner}) ranked
+WHERE ranked.similarity_score >= :similarity_threshold
+ORDER BY ranked.similarity_score DESC
+"""
+_VECTOR_SEARCH_SQL = text(_THRESHOLD_FILTER_SQL.format(inner=_VECTOR_SEARCH_SQL))
+_HALFVEC_RERANK_SEARCH_SQL = text(_THRESHOLD_FILTER_SQL.format(inner=_HALFVEC_RERANK_SEARCH_SQL))
+_HALFVEC_INDEX_RERANK_SEARCH_SQL = text(_THRESHOLD_FILTER_SQL.format(inner=_HALFVEC_INDEX_RERANK_SEARCH_SQL))
+
+# 调整索引召回参数：set_config(..., is_local=true) 等价于 SET LOCAL，且可以使用绑定参数
+_SET_IVFFLAT_PROBES_SQL = text("SELECT set_config('ivfflat.probes', :value, true)")
+_SET_HNSW_EF_SEARCH_SQL = text("SELECT set_config('hnsw.ef_search', :value, true)")
+
+# 其余语句同样在模块加载时构建一次，热路径上不再重复解析SQL文本与绑定参数
+_GET_EMBEDDING_SQL = text("SELECT embedding_data FROM embeddings WHERE chunk_id = :chunk_id")
+
+_DELETE_EMBEDDING_SQL = text("DELETE FROM embeddings WHERE chunk_id = :chunk_id")
+
+# DELETE ... USING 连接删除，按 idx_chunks_document_id / idx_embeddings_chunk_id 做嵌套循环
+_DELETE_BY_DOCUMENT_SQL = text("""
+DELETE FROM embeddings e
+USING chunks c
+WHERE e.chunk_id = c.id
+  AND c.document_id = :document_id
+""")
+
+_FIND_WITHOUT_EMBEDDINGS_SQL = text("""
+SELECT c.id 
+FROM chunks c 
+WHERE c.dataset_id = :dataset_id 
+  AND c.is_active = true 
+  AND NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.chunk_id = c.id)
+ORDER BY c.created_at DESC
+""")
+
+_FIND_WITH_EMBEDDINGS_SQL = text("""
+SELECT c.id 
+FROM chunks c 
+INNER JOIN embeddings e ON c.id = e.chunk_id 
+WHERE c.dataset_id = :dataset_id 
+  AND c.is_active = true 
+ORDER BY c.created_at DESC
+LIMIT :limit
+""")
+
+_COUNT_BY_KNOWLEDGE_BASE_SQL = text("""
+SELECT COUNT(e.id)
+FROM embeddings e
+INNER JOIN chunks c ON e.chunk_id = c.id
+WHERE c.dataset_id = :dataset_id AND c.is_active = true
+""")
+
 
 class EmbeddingVectorRepositoryImpl:
     """Embedding向量仓储实现"""
@@ -27,7 +220,7 @@ class EmbeddingVectorRepositoryImpl:
         version: int = 1
     ) -> bool:
         """
-        保存embedding向量数据
+        保存单条embedding向量数据（多条写入请直接调用 batch_save_embeddings）
         
         Args:
             chunk_id: 分块ID
@@ -38,42 +231,36 @@ class EmbeddingVectorRepositoryImpl:
         Returns:
             是否保存成功
         """
-        try:
-            # 生成UUID作为主键
-            embedding_id = uuid_generator.generate()
-            
-            # 验证向量维度（现在支持1024维）
-            if len(embedding_data) != 1024:
-                print(f"警告：向量维度不匹配，期望1024维，实际{len(embedding_data)}维")
-            
-            # 使用UPSERT操作（INSERT ... ON CONFLICT DO UPDATE）
-            sql = """
-            INSERT INTO embeddings (id, chunk_id, embedding_data, embedding_model_id, version)
-            VALUES (:id, :chunk_id, :embedding_data, :embedding_model_id, :version)
-            ON CONFLICT (chunk_id) 
-            DO UPDATE SET 
-                embedding_data = EXCLUDED.embedding_data,
-                embedding_model_id = EXCLUDED.embedding_model_id,
-                version = EXCLUDED.version,
-                created_at = CURRENT_TIMESTAMP
-            """
-            
-            # 将Python list转换为PostgreSQL vector格式
-            vector_str = '[' + ','.join(map(str, embedding_data)) + ']'
-            
-            await self.session.execute(text(sql), {
-                'id': embedding_id,
-                'chunk_id': chunk_id,
-                'embedding_data': vector_str,  # 使用字符串格式的向量
-                'embedding_model_id': embedding_model_id,
-                'version': version
-            })
-            
-            return True
-            
-        except Exception as e:
-            print(f"保存embedding向量失败: {str(e)}")
-            return False
+        # 验证向量维度
+        if len(embedding_data) != EMBEDDING_DIMENSION:
+            print(f"警告：向量维度不匹配，期望{EMBEDDING_DIMENSION}维，实际{len(embedding_data)}维")
+        
+        # 与批量写入共用同一条UPSERT语句，结果只对应本条记录
+        saved = await self.batch_save_embeddings([{
+            'chunk_id': chunk_id,
+            'embedding_data': embedding_data,
+            'embedding_model_id': embedding_model_id,
+            'version': version
+        }])
+        return saved > 0
+    
+    @staticmethod
+    def format_vector(embedding_data: List[float]) -> str:
+        """将向量转换为pgvector文本格式 '[x,y,...]'（仅用于COPY文本格式，绑定参数直接传浮点列表）"""
+        return '[' + ','.join(map(str, embedding_data)) + ']'
+    
+    @staticmethod
+    def parse_vector(vector_data: Any) -> List[float]:
+        """将pgvector返回值（'[...]'字符串或序列）解析为浮点列表"""
+        # 如果是字符串格式，去掉方括号并分割
+        if isinstance(vector_data, str):
+            vector_str = vector_data.strip('[]')
+            if np is not None:
+                # float64解析与float()结果一致；tolist()在C层完成转换
+                return np.fromstring(vector_str, dtype=np.float64, sep=',').tolist()
+            return [float(x) for x in vector_str.split(',')]
+        # 如果已经是序列格式，直接转换
+        return list(vector_data)
     
     async def get_embedding(self, chunk_id: str) -> Optional[List[float]]:
         """
@@ -86,20 +273,11 @@ class EmbeddingVectorRepositoryImpl:
             向量数据或None
         """
         try:
-            sql = "SELECT embedding_data FROM embeddings WHERE chunk_id = :chunk_id"
-            result = await self.session.execute(text(sql), {'chunk_id': chunk_id})
+            result = await self.session.execute(_GET_EMBEDDING_SQL, {'chunk_id': chunk_id})
             row = result.fetchone()
             
             if row and row[0] is not None:
-                vector_data = row[0]
-                # 如果是字符串格式，需要解析为list
-                if isinstance(vector_data, str):
-                    # 去掉方括号并分割
-                    vector_str = vector_data.strip('[]')
-                    return [float(x.strip()) for x in vector_str.split(',')]
-                else:
-                    # 如果已经是list格式，直接返回
-                    return list(vector_data)
+                return self.parse_vector(row[0])
             
             return None
             
@@ -109,31 +287,74 @@ class EmbeddingVectorRepositoryImpl:
     
     async def batch_save_embeddings(
         self, 
-        embeddings_data: List[Dict[str, Any]]
+        embeddings_data: List[Dict[str, Any]],
+        batch_size: int = _UPSERT_BATCH_SIZE
     ) -> int:
         """
-        批量保存embedding向量数据
+        批量保存embedding向量数据（按列组装数组参数，UNNEST UPSERT）
         
         Args:
             embeddings_data: 包含chunk_id, embedding_data, embedding_model_id等的字典列表
+            batch_size: 每条语句携带的最大行数
             
         Returns:
-            成功保存的数量
+            插入或更新的行数（以数据库报告的影响行数为准）
+            
+        Raises:
+            数据库异常原样抛出：此时事务已中止，由调用方回滚
         """
-        success_count = 0
+        if not embeddings_data:
+            return 0
         
-        for data in embeddings_data:
-            success = await self.save_embedding(
-                chunk_id=data['chunk_id'],
-                embedding_data=data['embedding_data'],
-                embedding_model_id=data['embedding_model_id'],
-                version=data.get('version', 1)
-            )
-            if success:
-                success_count += 1
+        # 按chunk_id去重（保留最后一条），避免同一批内重复写入同一行
+        unique_data = list({data['chunk_id']: data for data in embeddings_data}.values())
+        
+        try:
+            success_count = 0
+            for start in range(0, len(unique_data), batch_size):
+                batch = unique_data[start:start + batch_size]
+                result = await self.session.execute(_EMBEDDING_UPSERT_SQL, {
+                    'ids': uuid_generator.generate_batch(len(batch)),
+                    'chunk_ids': [data['chunk_id'] for data in batch],
+                    'embedding_data': [list(data['embedding_data']) for data in batch],
+                    'embedding_model_ids': [data['embedding_model_id'] for data in batch],
+                    'versions': [data.get('version', 1) for data in batch],
+                })
+                success_count += result.rowcount
+        except Exception:
+            logger.exception("批量保存embedding向量失败: %d 条", len(unique_data))
+            raise
         
         return success_count
     
+    async def batch_copy_embeddings(self, embeddings_data: List[Dict[str, Any]]) -> int:
+        """
+        使用COPY批量追加embedding向量数据
+        仅适用于确定不存在冲突的场景（如新写入分块的首次向量化），存在相同chunk_id时整批失败
+        
+        Args:
+            embeddings_data: 包含chunk_id, embedding_data, embedding_model_id等的字典列表
+            
+        Returns:
+            写入的行数
+        """
+        if not embeddings_data:
+            return 0
+        
+        embedding_ids = uuid_generator.generate_batch(len(embeddings_data))
+        rows = [
+            (
+                embedding_id,
+                data['chunk_id'],
+                self.format_vector(data['embedding_data']),
+                data['embedding_model_id'],
+                data.get('version', 1),
+            )
+            for data, embedding_id in zip(embeddings_data, embedding_ids)
+        ]
+        await copy_text_rows_to_table(self.session, 'embeddings', _EMBEDDING_COPY_COLUMNS, rows)
+        return len(rows)
+    
     async def delete_embedding(self, chunk_id: str) -> bool:
         """
         删除embedding向量数据
@@ -145,8 +366,7 @@ class EmbeddingVectorRepositoryImpl:
             是否删除成功
         """
         try:
-            sql = "DELETE FROM embeddings WHERE chunk_id = :chunk_id"
-            await self.session.execute(text(sql), {'chunk_id': chunk_id})
+            await self.session.execute(_DELETE_EMBEDDING_SQL, {'chunk_id': chunk_id})
             return True
             
         except Exception as e:
@@ -164,13 +384,7 @@ class EmbeddingVectorRepositoryImpl:
             删除的数量
         """
         try:
-            sql = """
-            DELETE FROM embeddings 
-            WHERE chunk_id IN (
-                SELECT id FROM chunks WHERE document_id = :document_id
-            )
-            """
-            result = await self.session.execute(text(sql), {'document_id': document_id})
+            result = await self.session.execute(_DELETE_BY_DOCUMENT_SQL, {'document_id': document_id})
             return result.rowcount or 0
             
         except Exception as e:
@@ -188,16 +402,7 @@ class EmbeddingVectorRepositoryImpl:
             没有向量的分块ID列表
         """
         try:
-            sql = """
-            SELECT c.id 
-            FROM chunks c 
-            LEFT JOIN embeddings e ON c.id = e.chunk_id 
-            WHERE c.dataset_id = :dataset_id 
-              AND c.is_active = true 
-              AND e.chunk_id IS NULL
-            ORDER BY c.created_at DESC
-            """
-            result = await self.session.execute(text(sql), {'dataset_id': knowledge_base_id})
+            result = await self.session.execute(_FIND_WITHOUT_EMBEDDINGS_SQL, {'dataset_id': knowledge_base_id})
             rows = result.fetchall()
             return [str(row[0]) for row in rows]
             
@@ -217,16 +422,7 @@ class EmbeddingVectorRepositoryImpl:
             有向量的分块ID列表
         """
         try:
-            sql = """
-            SELECT c.id 
-            FROM chunks c 
-            INNER JOIN embeddings e ON c.id = e.chunk_id 
-            WHERE c.dataset_id = :dataset_id 
-              AND c.is_active = true 
-            ORDER BY c.created_at DESC
-            LIMIT :limit
-            """
-            result = await self.session.execute(text(sql), {
+            result = await self.session.execute(_FIND_WITH_EMBEDDINGS_SQL, {
                 'dataset_id': knowledge_base_id,
                 'limit': limit
             })
@@ -242,7 +438,9 @@ class EmbeddingVectorRepositoryImpl:
         query_vector: List[float], 
         knowledge_base_id: str,
         limit: int = 10,
-        similarity_threshold: float = 0.0
+        similarity_threshold: float = 0.0,
+        probes: int = _IVFFLAT_PROBES,
+        ef_search: int = _HNSW_EF_SEARCH
     ) -> List[Dict[str, Any]]:
         """
         向量相似度搜索
@@ -252,37 +450,39 @@ class EmbeddingVectorRepositoryImpl:
             knowledge_base_id: 知识库ID
             limit: 返回结果数量限制
             similarity_threshold: 相似度阈值
+            probes: IVFFlat索引探测的聚类数（越大召回越高、越慢）
+            ef_search: HNSW索引搜索候选列表大小（越大召回越高、越慢）
             
         Returns:
             相似度搜索结果列表
         """
+        query_vector = list(query_vector)
+        
         try:
-            # 使用余弦相似度搜索（<=> 操作符）
-            sql = """
-            SELECT 
-                c.id as chunk_id,
-                c.content,
-                c.document_id,
-                c.index_in_doc,
-                c.meta,
-                (1 - (e.embedding_data <=> :query_vector)) as similarity_score
-            FROM chunks c
-            INNER JOIN embeddings e ON c.id = e.chunk_id
-            WHERE c.dataset_id = :dataset_id 
-              AND c.is_active = true
-              AND (1 - (e.embedding_data <=> :query_vector)) >= :threshold
-            ORDER BY e.embedding_data <=> :query_vector ASC
-            LIMIT :limit
-            """
+            candidate_limit = limit * _BINARY_RERANK_FACTOR
+            
+            # 调整向量索引的召回参数（仅对当前事务生效）
+            two_stage = EMBEDDING_VECTOR_TYPE == "halfvec" or EMBEDDING_INDEX_TYPE == "halfvec_hnsw"
+            if EMBEDDING_INDEX_TYPE == "ivfflat":
+                await self.session.execute(_SET_IVFFLAT_PROBES_SQL, {'value': str(int(probes))})
+            else:
+                # HNSW单次扫描最多返回 ef_search 个结果，需不小于本次要取的行数
+                needed = candidate_limit if two_stage else limit
+                await self.session.execute(_SET_HNSW_EF_SEARCH_SQL, {'value': str(max(int(ef_search), needed))})
             
-            # 将查询向量转换为PostgreSQL vector格式
-            query_vector_str = '[' + ','.join(map(str, query_vector)) + ']'
+            if EMBEDDING_VECTOR_TYPE == "halfvec":
+                sql = _HALFVEC_RERANK_SEARCH_SQL
+            elif EMBEDDING_INDEX_TYPE == "halfvec_hnsw":
+                sql = _HALFVEC_INDEX_RERANK_SEARCH_SQL
+            else:
+                sql = _VECTOR_SEARCH_SQL
             
-            result = await self.session.execute(text(sql), {
-                'query_vector': query_vector_str,
+            result = await self.session.execute(sql, {
+                'query_vector': query_vector,
                 'dataset_id': knowledge_base_id,
-                'threshold': similarity_threshold,
-                'limit': limit
+                'limit': limit,
+                'candidate_limit': candidate_limit,
+                'similarity_threshold': similarity_threshold
             })
             
             rows = result.fetchall()
@@ -325,13 +525,7 @@ class EmbeddingVectorRepositoryImpl:
             向量数量
         """
         try:
-            sql = """
-            SELECT COUNT(e.id)
-            FROM embeddings e
-            INNER JOIN chunks c ON e.chunk_id = c.id
-            WHERE c.dataset_id = :dataset_id AND c.is_active = true
-            """
-            result = await self.session.execute(text(sql), {'dataset_id': knowledge_base_id})
+            result = await self.session.execute(_COUNT_BY_KNOWLEDGE_BASE_SQL, {'dataset_id': knowledge_base_id})
             return result.scalar() or 0
             
         except Exception as e:
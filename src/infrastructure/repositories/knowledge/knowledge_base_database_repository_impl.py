@@ -2,15 +2,36 @@
 知识库仓储PostgreSQL实现
 """
 
-from typing import List, Optional, Dict, Any
+import logging
+import os
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, delete, exists, func, text
+from sqlalchemy.exc import DBAPIError, IntegrityError
 
 from ....domain.knowledge.entities.knowledge_base import KnowledgeBase
 from ....domain.knowledge.repositories.knowledge_base_repository import KnowledgeBaseRepository
 from ...models.knowledge_models import DatasetModel
+from ...cache import get_redis_cache, invalidate_after_commit
+from .embedding_config_repository_impl import embedding_config_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 知识库更新语句的服务端超时（SET LOCAL 只作用于当前事务）
+_UPDATE_STATEMENT_TIMEOUT_SQL = text("SET LOCAL statement_timeout = '30s'")
+
+# PostgreSQL query_canceled 错误码（statement_timeout 触发）
+_QUERY_CANCELED_SQLSTATE = '57014'
+
+# 知识库元数据读多写少，按ID缓存在Redis中（各进程共享）；update/delete 在事务提交后删除缓存键，
+# 与embedding配置缓存同样的失效方式，其他进程不会继续读到已删除或改名的知识库
+KNOWLEDGE_BASE_CACHE_TTL = int(os.getenv("KNOWLEDGE_BASE_CACHE_TTL", "60"))
+
+
+def knowledge_base_cache_key(knowledge_base_id: str) -> str:
+    """知识库实体的缓存键"""
+    return f"kb:{knowledge_base_id}"
 
 
 class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
@@ -40,10 +61,9 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
                 is_deleted=False
             )
             
-            # 添加到会话并刷新获取ID和时间戳
+            # 添加到会话并flush：INSERT ... RETURNING 已带回ID和服务端生成的时间戳，无需再 refresh
             self.session.add(db_model)
             await self.session.flush()
-            await self.session.refresh(db_model)
             
             # 更新实体的ID和时间戳
             knowledge_base.knowledge_base_id = str(db_model.id)
@@ -59,6 +79,12 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
     
     async def find_by_id(self, knowledge_base_id: str) -> Optional[KnowledgeBase]:
         """根据ID查找知识库"""
+        cache = get_redis_cache()
+        cache_key = knowledge_base_cache_key(knowledge_base_id)
+        cached = await cache.get_json(cache_key)
+        if cached is not None:
+            return self._from_cache(cached)
+        
         try:
             stmt = select(DatasetModel).where(
                 DatasetModel.id == knowledge_base_id,
@@ -70,7 +96,9 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
             if db_model is None:
                 return None
             
-            return self._convert_to_entity(db_model)
+            knowledge_base = self._convert_to_entity(db_model)
+            await cache.set_json(cache_key, self._to_cache(knowledge_base), KNOWLEDGE_BASE_CACHE_TTL)
+            return knowledge_base
             
         except (ValueError, TypeError):
             return None
@@ -83,9 +111,8 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
         ).order_by(DatasetModel.created_at.desc())
         
         result = await self.session.execute(stmt)
-        db_models = result.scalars().all()
-        
-        return [self._convert_to_entity(db_model) for db_model in db_models]
+        # 直接在ScalarResult上转换，不再先 .all() 生成一份中间列表
+        return list(map(self._convert_to_entity, result.scalars()))
     
     async def find_active_by_owner_id(self, owner_id: str) -> List[KnowledgeBase]:
         """根据所有者ID查找活跃的知识库列表"""
@@ -104,50 +131,48 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
             if not isinstance(config_to_save, dict):
                 config_to_save = {}
             
-            print(f"开始更新知识库 {kb_id}, 配置: {config_to_save}")
-            
-            # 执行更新（添加超时处理）
+            now = datetime.now()
             stmt = update(DatasetModel).where(
                 DatasetModel.id == kb_id
             ).values(
                 name=knowledge_base.name,
                 description=knowledge_base.description,
                 embedding_model_config=config_to_save,
-                updated_at=datetime.now()
+                updated_at=now
             )
             
-            print(f"正在执行SQL更新语句...")
-            
-            # 使用asyncio.wait_for添加超时控制
-            import asyncio
+            # 超时由数据库在服务端取消语句（仅对当前事务生效），连接保持可用，可以正常回滚
+            await self.session.execute(_UPDATE_STATEMENT_TIMEOUT_SQL)
             try:
-                result = await asyncio.wait_for(
-                    self.session.execute(stmt), 
-                    timeout=30.0  # 30秒超时
-                )
-                print(f"SQL执行完成，影响行数: {result.rowcount}")
-            except asyncio.TimeoutError:
-                print(f"错误：SQL执行超时，可能存在数据库锁等待")
+                result = await self.session.execute(stmt)
+            except DBAPIError as e:
                 await self.session.rollback()
-                raise ValueError(f"数据库更新超时，可能存在锁冲突或长时间事务")
+                if getattr(e.orig, 'sqlstate', None) == _QUERY_CANCELED_SQLSTATE:
+                    raise ValueError("数据库更新超时，可能存在锁冲突或长时间事务")
+                raise
             
             # 检查是否更新成功
             if result.rowcount == 0:
                 raise ValueError(f"更新失败：找不到ID为{kb_id}的知识库")
             
             # 更新实体的时间戳
-            knowledge_base.updated_at = datetime.now()
+            knowledge_base.updated_at = now
             
-            print(f"数据库更新成功，直接返回结果")
+            # 提交后清除知识库缓存；配置可能已变更，同时清除embedding配置缓存
+            invalidate_after_commit(
+                self.session,
+                knowledge_base_cache_key(kb_id),
+                embedding_config_cache_key(kb_id, knowledge_base.owner_id)
+            )
             
             # 直接返回更新后的实体，不进行数据库验证查询（避免锁等待）
             return knowledge_base
             
         except (ValueError, TypeError) as e:
-            print(f"类型错误: {str(e)}")
+            logger.debug("知识库更新参数错误: %s", e)
             raise ValueError(f"更新知识库失败: {str(e)}")
         except Exception as e:
-            print(f"简化更新异常: {str(e)}")
+            logger.debug("知识库更新异常: %s", e)
             raise ValueError(f"数据库操作失败: {str(e)}")
     
     async def delete_by_id(self, knowledge_base_id: str) -> bool:
@@ -163,6 +188,13 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
             )
             
             result = await self.session.execute(stmt)
+            
+            # 提交后清除缓存，已删除的知识库不应再命中知识库缓存和embedding配置缓存
+            invalidate_after_commit(
+                self.session,
+                knowledge_base_cache_key(kb_id),
+                patterns=(embedding_config_cache_key(kb_id, '*'),)
+            )
             return result.rowcount > 0
             
         except (ValueError, TypeError):
@@ -170,51 +202,67 @@ class KnowledgeBaseDatabaseRepositoryImpl(KnowledgeBaseRepository):
     
     async def exists_by_name_and_owner(self, name: str, owner_id: str) -> bool:
         """检查指定所有者下是否存在同名知识库"""
-        stmt = select(DatasetModel.id).where(
+        stmt = select(exists().where(
             DatasetModel.name == name,
             DatasetModel.user_id == owner_id,
             DatasetModel.is_deleted == False
-        )
+        ))
         
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
+        return bool(result.scalar())
     
     async def count_by_owner_id(self, owner_id: str) -> int:
         """统计所有者的知识库数量"""
-        stmt = select(DatasetModel.id).where(
+        stmt = select(func.count()).select_from(DatasetModel).where(
             DatasetModel.user_id == owner_id,
             DatasetModel.is_deleted == False
         )
         
         result = await self.session.execute(stmt)
-        return len(result.scalars().all())
+        return result.scalar_one()
+    
+    @staticmethod
+    def _to_cache(knowledge_base: KnowledgeBase) -> Dict[str, Any]:
+        """将知识库实体转换为可JSON序列化的缓存值"""
+        return {
+            'knowledge_base_id': knowledge_base.knowledge_base_id,
+            'name': knowledge_base.name,
+            'description': knowledge_base.description,
+            'owner_id': knowledge_base.owner_id,
+            'config': knowledge_base.config,
+            'is_active': knowledge_base.is_active,
+            'created_at': knowledge_base.created_at.isoformat() if knowledge_base.created_at else None,
+            'updated_at': knowledge_base.updated_at.isoformat() if knowledge_base.updated_at else None,
+        }
+    
+    @staticmethod
+    def _from_cache(cached: Dict[str, Any]) -> KnowledgeBase:
+        """从缓存值还原知识库实体（每次都是新对象，调用方修改不会影响缓存）"""
+        created_at = cached.get('created_at')
+        updated_at = cached.get('updated_at')
+        return KnowledgeBase(
+            knowledge_base_id=cached['knowledge_base_id'],
+            name=cached['name'],
+            description=cached['description'],
+            owner_id=cached['owner_id'],
+            config=cached['config'] or {},
+            is_active=cached['is_active'],
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else None
+        )
     
     def _convert_to_entity(self, db_model: DatasetModel) -> KnowledgeBase:
         """将数据库模型转换为领域实体"""
-        # 确保配置是字典格式
-        config: Dict[str, Any] = {}
-        if hasattr(db_model, 'embedding_model_config') and db_model.embedding_model_config is not None:
-            try:
-                if isinstance(db_model.embedding_model_config, dict):
-                    config = dict(db_model.embedding_model_config)
-                else:
-                    # 如果不是字典，尝试解析为JSON
-                    import json
-                    if isinstance(db_model.embedding_model_config, str):
-                        config = json.loads(db_model.embedding_model_config)
-                    else:
-                        config = {}
-            except Exception as e:
-                print(f"警告：解析配置失败 - {str(e)}, 使用空配置")
-                config = {}
+        # embedding_model_config 为JSONB列，驱动已解码为dict；复制一份避免修改实体时写回ORM对象
+        config = db_model.embedding_model_config
         
         return KnowledgeBase(
             knowledge_base_id=str(db_model.id),
-            name=str(getattr(db_model, 'name', '')),
-            description=str(getattr(db_model, 'description', '')),
-            owner_id=str(getattr(db_model, 'user_id', '')),
-            config=config,
-            is_active=not bool(getattr(db_model, 'is_deleted', False)),
-            created_at=getattr(db_model, 'created_at', None),
-            updated_at=getattr(db_model, 'updated_at', None)
+            name=db_model.name,
+            description=db_model.description or '',
+            owner_id=str(db_model.user_id),
+            config=dict(config) if config else {},
+            is_active=not db_model.is_deleted,
+            created_at=db_model.created_at,
+            updated_at=db_model.updated_at
         )
\ No newline at end of file
@@ -2,7 +2,8 @@
 知识库仓储内存实现（测试用）
 """
 
-from typing import List, Optional, Dict, Any
+from collections import defaultdict
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime
 import uuid
 
@@ -16,13 +17,44 @@ class KnowledgeBaseRepositoryImpl(KnowledgeBaseRepository):
     def __init__(self, session=None):
         self.session = session
         self._storage: Dict[str, KnowledgeBase] = {}
+        # 二级索引：所有者 -> 知识库ID集合；(名称, 所有者) -> 知识库ID集合
+        self._by_owner: Dict[Optional[str], Set[str]] = defaultdict(set)
+        self._by_name_owner: Dict[Tuple[str, Optional[str]], Set[str]] = defaultdict(set)
+        # 知识库ID -> 建立索引时的 (名称, 所有者)，实体被原地修改后仍能找到旧索引项
+        self._index_keys: Dict[str, Tuple[str, Optional[str]]] = {}
+    
+    def _index(self, knowledge_base: KnowledgeBase) -> None:
+        """写入存储并刷新二级索引"""
+        kb_id = knowledge_base.knowledge_base_id
+        self._unindex(kb_id)
+        name_owner = (knowledge_base.name, knowledge_base.owner_id)
+        self._storage[kb_id] = knowledge_base
+        self._by_owner[knowledge_base.owner_id].add(kb_id)
+        self._by_name_owner[name_owner].add(kb_id)
+        self._index_keys[kb_id] = name_owner
+    
+    def _unindex(self, kb_id: str) -> None:
+        """移除知识库的二级索引项"""
+        name_owner = self._index_keys.pop(kb_id, None)
+        if name_owner is None:
+            return
+        self._discard(self._by_owner, name_owner[1], kb_id)
+        self._discard(self._by_name_owner, name_owner, kb_id)
+    
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key: Any, kb_id: str) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(kb_id)
+            if not ids:
+                del index[key]
     
     async def save(self, knowledge_base: KnowledgeBase) -> KnowledgeBase:
         """保存知识库"""
         if knowledge_base.knowledge_base_id is None:
             knowledge_base.knowledge_base_id = str(uuid.uuid4())
         
-        self._storage[knowledge_base.knowledge_base_id] = knowledge_base
+        self._index(knowledge_base)
         return knowledge_base
     
     async def find_by_id(self, knowledge_base_id: str) -> Optional[KnowledgeBase]:
@@ -31,45 +63,39 @@ class KnowledgeBaseRepositoryImpl(KnowledgeBaseRepository):
     
     async def find_by_user_id(self, user_id: str) -> List[KnowledgeBase]:
         """根据用户ID查找知识库列表"""
-        return [kb for kb in self._storage.values() if kb.owner_id == user_id]
+        return await self.find_by_owner_id(user_id)
     
     async def find_by_owner_id(self, owner_id: str) -> List[KnowledgeBase]:
         """根据所有者ID查找知识库列表"""
-        return [kb for kb in self._storage.values() if kb.owner_id == owner_id]
+        return [self._storage[kb_id] for kb_id in self._by_owner.get(owner_id, ())]
     
     async def find_active_by_owner_id(self, owner_id: str) -> List[KnowledgeBase]:
         """根据所有者ID查找活跃的知识库列表"""
-        return [kb for kb in self._storage.values() 
-                if kb.owner_id == owner_id and kb.is_active]
+        return [kb for kb in await self.find_by_owner_id(owner_id) if kb.is_active]
     
     async def update(self, knowledge_base: KnowledgeBase) -> KnowledgeBase:
         """更新知识库"""
         knowledge_base.updated_at = datetime.now()
         if knowledge_base.knowledge_base_id is not None:
-            self._storage[knowledge_base.knowledge_base_id] = knowledge_base
+            self._index(knowledge_base)
         return knowledge_base
     
     async def delete_by_id(self, knowledge_base_id: str) -> bool:
         """根据ID删除知识库"""
         if knowledge_base_id in self._storage:
             del self._storage[knowledge_base_id]
+            self._unindex(knowledge_base_id)
             return True
         return False
     
     async def exists_by_name_and_user_id(self, name: str, user_id: str) -> bool:
         """检查指定用户是否已有同名知识库"""
-        for kb in self._storage.values():
-            if kb.name == name and kb.owner_id == user_id:
-                return True
-        return False
+        return await self.exists_by_name_and_owner(name, user_id)
     
     async def exists_by_name_and_owner(self, name: str, owner_id: str) -> bool:
         """检查指定所有者下是否存在同名知识库"""
-        for kb in self._storage.values():
-            if kb.name == name and kb.owner_id == owner_id:
-                return True
-        return False
+        return (name, owner_id) in self._by_name_owner
     
     async def count_by_owner_id(self, owner_id: str) -> int:
         """统计所有者的知识库数量"""
-        return len([kb for kb in self._storage.values() if kb.owner_id == owner_id])
\ No newline at end of file
+        return len(self._by_owner.get(owner_id, ()))
\ No newline at end of file
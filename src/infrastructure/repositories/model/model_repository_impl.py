@@ -7,12 +7,37 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam, delete, exists, update
+from sqlalchemy.orm import raiseload
 
 from ....domain.provider.repositories.model_repository import ModelRepository
 from ....domain.provider.entities.model import Model
 from ....domain.provider.exceptions import ModelAlreadyExistsError, RepositoryError
 from ...models.provider_models import ModelModel
+from ...utils.db_errors import integrity_error_detail
+
+# 查询语句在模块加载时构建一次，调用时只绑定参数
+_PROVIDER_AND_NAME_CONDITION = and_(
+    ModelModel.provider_name == bindparam('provider_name'),
+    ModelModel.model_name == bindparam('model_name')
+)
+
+_FIND_BY_PROVIDER_AND_NAME_STMT = select(ModelModel).where(_PROVIDER_AND_NAME_CONDITION)
+
+_FIND_PROVIDER_NAME_BY_MODEL_NAME_STMT = select(ModelModel.provider_name).where(
+    ModelModel.model_name == bindparam('model_name')
+)
+
+# 列表查询禁止隐式懒加载：异步会话下的懒加载会在运行时报错，在此提前暴露
+_FIND_BY_PROVIDER_NAME_STMT = select(ModelModel).options(raiseload('*')).where(
+    ModelModel.provider_name == bindparam('provider_name')
+)
+
+_FIND_BY_TYPE_STMT = select(ModelModel).options(raiseload('*')).where(
+    ModelModel.type == bindparam('type')
+)
+
+_EXISTS_STMT = select(exists().where(_PROVIDER_AND_NAME_CONDITION))
 
 
 class ModelRepositoryImpl(ModelRepository):
@@ -26,7 +51,8 @@ class ModelRepositoryImpl(ModelRepository):
     async def save(self, model: Model) -> Model:
         """保存Model实体"""
         try:
-            # 创建数据模型
+            # 创建数据模型（创建与更新时间取同一时刻）
+            now = datetime.now()
             model_data = ModelModel(
                 model_name=model.model_name,
                 type=model.type,
@@ -34,23 +60,26 @@ class ModelRepositoryImpl(ModelRepository):
                 model_metadata=model.get_metadata_json(),
                 provider_name=model.provider_name,
                 is_delete=model.is_delete,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+                created_at=now,
+                updated_at=now
             )
             
             # 保存到数据库
+            # flush 时 INSERT ... RETURNING 带回主键与服务端默认值（eager_defaults 默认 "auto"），
+            # 提交前转换为实体，不再提交后 refresh 多查一次
             self._session.add(model_data)
+            await self._session.flush()
+            saved_model = self._convert_to_entity(model_data)
             await self._session.commit()
-            await self._session.refresh(model_data)
             
-            # 转换回领域实体
-            return self._convert_to_entity(model_data)
+            return saved_model
             
         except IntegrityError as e:
             await self._session.rollback()
-            if 'unique_provider_model' in str(e):
+            violated = integrity_error_detail(e)
+            if 'unique_provider_model' in violated:
                 raise ModelAlreadyExistsError(model.provider_name, model.model_name)
-            raise RepositoryError(f"数据库完整性错误: {str(e)}")
+            raise RepositoryError(f"数据库完整性错误: {violated}")
         except Exception as e:
             await self._session.rollback()
             raise RepositoryError(f"保存Model失败: {str(e)}")
@@ -58,9 +87,8 @@ class ModelRepositoryImpl(ModelRepository):
     async def find_by_id(self, model_id: str) -> Optional[Model]:
         """根据ID查找Model"""
         try:
-            stmt = select(ModelModel).where(ModelModel.id == model_id)
-            result = await self._session.execute(stmt)
-            model_data = result.scalar_one_or_none()
+            # 主键查询走 session.get：先查身份映射，命中时不发SQL
+            model_data = await self._session.get(ModelModel, model_id)
             
             return self._convert_to_entity(model_data) if model_data else None
             
@@ -70,13 +98,10 @@ class ModelRepositoryImpl(ModelRepository):
     async def find_by_provider_and_name(self, provider_name: str, model_name: str) -> Optional[Model]:
         """根据提供商名称和模型名称查找Model"""
         try:
-            stmt = select(ModelModel).where(
-                and_(
-                    ModelModel.provider_name == provider_name,
-                    ModelModel.model_name == model_name
-                )
+            result = await self._session.execute(
+                _FIND_BY_PROVIDER_AND_NAME_STMT,
+                {'provider_name': provider_name, 'model_name': model_name}
             )
-            result = await self._session.execute(stmt)
             model_data = result.scalar_one_or_none()
             
             return self._convert_to_entity(model_data) if model_data else None
@@ -87,8 +112,9 @@ class ModelRepositoryImpl(ModelRepository):
     async def find_provider_name_by_model_name(self, model_name: str) -> Optional[str]:
         """根据模型名称查找提供商名称"""
         try:
-            stmt = select(ModelModel.provider_name).where(ModelModel.model_name == model_name)
-            result = await self._session.execute(stmt)
+            result = await self._session.execute(
+                _FIND_PROVIDER_NAME_BY_MODEL_NAME_STMT, {'model_name': model_name}
+            )
             provider_name = result.scalar_one_or_none()
             
             return provider_name
@@ -99,8 +125,9 @@ class ModelRepositoryImpl(ModelRepository):
     async def find_by_provider_name(self, provider_name: str) -> List[Model]:
         """根据提供商名称查找所有Model"""
         try:
-            stmt = select(ModelModel).where(ModelModel.provider_name == provider_name)
-            result = await self._session.execute(stmt)
+            result = await self._session.execute(
+                _FIND_BY_PROVIDER_NAME_STMT, {'provider_name': provider_name}
+            )
             model_data_list = result.scalars().all()
             
             return [self._convert_to_entity(model_data) for model_data in model_data_list]
@@ -111,8 +138,7 @@ class ModelRepositoryImpl(ModelRepository):
     async def find_by_type(self, model_type: str) -> List[Model]:
         """根据模型类型查找Model"""
         try:
-            stmt = select(ModelModel).where(ModelModel.type == model_type.lower())
-            result = await self._session.execute(stmt)
+            result = await self._session.execute(_FIND_BY_TYPE_STMT, {'type': model_type.lower()})
             model_data_list = result.scalars().all()
             
             return [self._convert_to_entity(model_data) for model_data in model_data_list]
@@ -123,27 +149,28 @@ class ModelRepositoryImpl(ModelRepository):
     async def update(self, model: Model) -> Model:
         """更新Model实体"""
         try:
-            # 查找现有记录
-            stmt = select(ModelModel).where(ModelModel.id == model.id)
+            # 单条 UPDATE ... RETURNING 完成更新并取回最新行，不再先查询再修改
+            stmt = update(ModelModel).where(
+                ModelModel.id == model.id
+            ).values(
+                model_name=model.model_name,
+                type=model.type,
+                subtype=model.subtype,
+                model_metadata=model.get_metadata_json(),
+                is_delete=model.is_delete,
+                updated_at=datetime.now()
+            ).returning(ModelModel)
             result = await self._session.execute(stmt)
             model_data = result.scalar_one_or_none()
             
             if not model_data:
                 raise RepositoryError(f"Model不存在: ID={model.id}")
             
-            # 更新字段
-            model_data.model_name = model.model_name  # type: ignore
-            model_data.type = model.type  # type: ignore
-            model_data.subtype = model.subtype  # type: ignore
-            model_data.model_metadata = model.get_metadata_json()  # type: ignore
-            model_data.is_delete = model.is_delete  # type: ignore
-            model_data.updated_at = datetime.now()  # type: ignore
-            
-            # 提交更改
+            # 提交前转换：提交后对象过期，再访问属性会触发隐式加载
+            updated_model = self._convert_to_entity(model_data)
             await self._session.commit()
-            await self._session.refresh(model_data)
             
-            return self._convert_to_entity(model_data)
+            return updated_model
             
         except Exception as e:
             await self._session.rollback()
@@ -152,16 +179,13 @@ class ModelRepositoryImpl(ModelRepository):
     async def delete(self, model_id: int) -> bool:
         """删除Model"""
         try:
-            stmt = select(ModelModel).where(ModelModel.id == model_id)
+            # 单条 DELETE，以影响行数判断记录是否存在
+            stmt = delete(ModelModel).where(
+                ModelModel.id == model_id
+            ).execution_options(synchronize_session=False)
             result = await self._session.execute(stmt)
-            model_data = result.scalar_one_or_none()
-            
-            if not model_data:
-                return False
-            
-            await self._session.delete(model_data)
             await self._session.commit()
-            return True
+            return result.rowcount > 0
             
         except Exception as e:
             await self._session.rollback()
@@ -170,14 +194,11 @@ class ModelRepositoryImpl(ModelRepository):
     async def exists(self, provider_name: str, model_name: str) -> bool:
         """检查Model是否存在"""
         try:
-            stmt = select(ModelModel.id).where(
-                and_(
-                    ModelModel.provider_name == provider_name,
-                    ModelModel.model_name == model_name
-                )
+            result = await self._session.execute(
+                _EXISTS_STMT,
+                {'provider_name': provider_name, 'model_name': model_name}
             )
-            result = await self._session.execute(stmt)
-            return result.scalar_one_or_none() is not None
+            return bool(result.scalar())
             
         except Exception as e:
             raise RepositoryError(f"检查Model存在性失败: {str(e)}")
@@ -10,14 +10,54 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam, exists, update
+from sqlalchemy.orm import raiseload
 
 from ....domain.provider.repositories.provider_repository import ProviderRepository
 from ....domain.provider.entities.provider import Provider
 from ....domain.provider.value_objects.api_key import ApiKey
 from ....domain.provider.value_objects.base_url import BaseUrl
+from ....domain.provider.value_objects.provider_summary import ProviderSummary
 from ....domain.provider.exceptions import ProviderAlreadyExistsError, RepositoryError
+from ...cache import invalidate_after_commit
 from ...models.provider_models import ProviderModel
+from ..knowledge.embedding_config_repository_impl import embedding_config_cache_key
+from ...utils.db_errors import integrity_error_detail
+
+# 查询语句在模块加载时构建一次，调用时只绑定参数
+_ACTIVE_PROVIDER_CONDITION = and_(
+    ProviderModel.user_id == bindparam('user_id'),
+    ProviderModel.provider == bindparam('provider'),
+    ProviderModel.is_delete == 0
+)
+
+_FIND_BY_USER_AND_PROVIDER_STMT = select(ProviderModel).where(_ACTIVE_PROVIDER_CONDITION)
+
+# 列表查询禁止隐式懒加载：异步会话下的懒加载会在运行时报错，在此提前暴露
+_FIND_BY_USER_STMT = select(ProviderModel).options(raiseload('*')).where(
+    and_(
+        ProviderModel.user_id == bindparam('user_id'),
+        ProviderModel.is_delete == 0
+    )
+)
+
+# 摘要查询只取展示所需的列，列标签与 ProviderSummary 字段一一对应
+_FIND_SUMMARIES_BY_USER_STMT = select(
+    ProviderModel.id,
+    ProviderModel.user_id,
+    ProviderModel.provider,
+    ProviderModel.api_key.label('encrypted_api_key'),
+    ProviderModel.base_url,
+    ProviderModel.created_at,
+    ProviderModel.updated_at
+).where(
+    and_(
+        ProviderModel.user_id == bindparam('user_id'),
+        ProviderModel.is_delete == 0
+    )
+)
+
+_EXISTS_STMT = select(exists().where(_ACTIVE_PROVIDER_CONDITION))
 
 
 class ProviderRepositoryImpl(ProviderRepository):
@@ -28,33 +68,42 @@ class ProviderRepositoryImpl(ProviderRepository):
     def __init__(self, session: AsyncSession):
         self._session: AsyncSession = session
     
+    def _invalidate_embedding_configs(self, user_id: str) -> None:
+        """提交后清除该用户所有知识库的embedding配置缓存（缓存值中含提供商凭证与Base URL）"""
+        invalidate_after_commit(self._session, patterns=(embedding_config_cache_key('*', user_id),))
+    
     async def save(self, provider: Provider) -> Provider:
         """保存Provider实体"""
         try:
-            # 创建数据模型
+            # 创建数据模型（创建与更新时间取同一时刻）
+            now = datetime.now()
             provider_model = ProviderModel(
                 user_id=provider.user_id,
                 provider=provider.provider,
                 api_key=provider.api_key.encrypted_value,
                 base_url=str(provider.base_url) if not provider.base_url.is_empty() else None,
                 is_delete=provider.is_delete,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+                created_at=now,
+                updated_at=now
             )
             
             # 保存到数据库
+            # flush 时 INSERT ... RETURNING 带回主键与服务端默认值（eager_defaults 默认 "auto"），
+            # 提交前转换为实体，不再提交后 refresh 多查一次
             self._session.add(provider_model)
+            await self._session.flush()
+            saved_provider = self._convert_to_entity(provider_model)
+            self._invalidate_embedding_configs(provider.user_id)
             await self._session.commit()
-            await self._session.refresh(provider_model)
             
-            # 转换回领域实体
-            return self._convert_to_entity(provider_model)
+            return saved_provider
             
         except IntegrityError as e:
             await self._session.rollback()
-            if 'unique_user_provider' in str(e):
+            violated = integrity_error_detail(e)
+            if 'unique_user_provider' in violated:
                 raise ProviderAlreadyExistsError(provider.user_id, provider.provider)
-            raise RepositoryError(f"数据库完整性错误: {str(e)}")
+            raise RepositoryError(f"数据库完整性错误: {violated}")
         except Exception as e:
             await self._session.rollback()
             raise RepositoryError(f"保存Provider失败: {str(e)}")
@@ -62,16 +111,12 @@ class ProviderRepositoryImpl(ProviderRepository):
     async def find_by_id(self, provider_id: str) -> Optional[Provider]:
         """根据ID查找Provider（只返回未删除的记录）"""
         try:
-            stmt = select(ProviderModel).where(
-                and_(
-                    ProviderModel.id == provider_id,
-                    ProviderModel.is_delete == 0
-                )
-            )
-            result = await self._session.execute(stmt)
-            provider_model = result.scalar_one_or_none()
+            # 主键查询走 session.get：先查身份映射，命中时不发SQL；软删除的记录在取回后过滤
+            provider_model = await self._session.get(ProviderModel, provider_id)
+            if provider_model is None or provider_model.is_delete != 0:
+                return None
             
-            return self._convert_to_entity(provider_model) if provider_model else None
+            return self._convert_to_entity(provider_model)
             
         except Exception as e:
             raise RepositoryError(f"查找Provider失败: {str(e)}")
@@ -79,14 +124,10 @@ class ProviderRepositoryImpl(ProviderRepository):
     async def find_by_user_and_provider(self, user_id: str, provider_name: str) -> Optional[Provider]:
         """根据用户ID和提供商名称查找Provider（只返回未删除的记录）"""
         try:
-            stmt = select(ProviderModel).where(
-                and_(
-                    ProviderModel.user_id == user_id,
-                    ProviderModel.provider == provider_name.lower(),
-                    ProviderModel.is_delete == 0
-                )
+            result = await self._session.execute(
+                _FIND_BY_USER_AND_PROVIDER_STMT,
+                {'user_id': user_id, 'provider': provider_name.lower()}
             )
-            result = await self._session.execute(stmt)
             provider_model = result.scalar_one_or_none()
             
             return self._convert_to_entity(provider_model) if provider_model else None
@@ -97,13 +138,7 @@ class ProviderRepositoryImpl(ProviderRepository):
     async def find_by_user_id(self, user_id: str) -> List[Provider]:
         """根据用户ID查找所有Provider（只返回未删除的记录）"""
         try:
-            stmt = select(ProviderModel).where(
-                and_(
-                    ProviderModel.user_id == user_id,
-                    ProviderModel.is_delete == 0
-                )
-            )
-            result = await self._session.execute(stmt)
+            result = await self._session.execute(_FIND_BY_USER_STMT, {'user_id': user_id})
             provider_models = result.scalars().all()
             
             return [self._convert_to_entity(model) for model in provider_models]
@@ -111,28 +146,39 @@ class ProviderRepositoryImpl(ProviderRepository):
         except Exception as e:
             raise RepositoryError(f"查找用户Provider列表失败: {str(e)}")
     
+    async def find_summaries_by_user_id(self, user_id: str) -> List[ProviderSummary]:
+        """根据用户ID查找所有Provider摘要（只返回未删除的记录）"""
+        try:
+            result = await self._session.execute(_FIND_SUMMARIES_BY_USER_STMT, {'user_id': user_id})
+            return [ProviderSummary(**row) for row in result.mappings()]
+            
+        except Exception as e:
+            raise RepositoryError(f"查找用户Provider摘要失败: {str(e)}")
+    
     async def update(self, provider: Provider) -> Provider:
         """更新Provider实体"""
         try:
-            # 查找现有记录
-            stmt = select(ProviderModel).where(ProviderModel.id == provider.id)
+            # 单条 UPDATE ... RETURNING 完成更新并取回最新行，不再先查询再修改
+            stmt = update(ProviderModel).where(
+                ProviderModel.id == provider.id
+            ).values(
+                api_key=provider.api_key.encrypted_value,
+                base_url=str(provider.base_url) if not provider.base_url.is_empty() else None,
+                is_delete=provider.is_delete,
+                updated_at=datetime.now()
+            ).returning(ProviderModel)
             result = await self._session.execute(stmt)
             provider_model = result.scalar_one_or_none()
             
             if not provider_model:
                 raise RepositoryError(f"Provider不存在: ID={provider.id}")
             
-            # 更新字段
-            provider_model.api_key = provider.api_key.encrypted_value  # type: ignore
-            provider_model.base_url = str(provider.base_url) if not provider.base_url.is_empty() else None  # type: ignore
-            provider_model.is_delete = provider.is_delete  # type: ignore
-            provider_model.updated_at = datetime.now()  # type: ignore
-            
-            # 提交更改
+            # 提交前转换：提交后对象过期，再访问属性会触发隐式加载
+            updated_provider = self._convert_to_entity(provider_model)
+            self._invalidate_embedding_configs(updated_provider.user_id)
             await self._session.commit()
-            await self._session.refresh(provider_model)
             
-            return self._convert_to_entity(provider_model)
+            return updated_provider
             
         except Exception as e:
             await self._session.rollback()
@@ -141,22 +187,22 @@ class ProviderRepositoryImpl(ProviderRepository):
     async def delete(self, provider_id: str) -> bool:
         """软删除Provider（设置is_delete=1）"""
         try:
-            stmt = select(ProviderModel).where(
+            # 单条 UPDATE 完成软删除，以影响行数判断记录是否存在
+            stmt = update(ProviderModel).where(
                 and_(
                     ProviderModel.id == provider_id,
                     ProviderModel.is_delete == 0
                 )
-            )
+            ).values(
+                is_delete=1,
+                updated_at=datetime.now()
+            ).returning(ProviderModel.user_id).execution_options(synchronize_session=False)
             result = await self._session.execute(stmt)
-            provider_model = result.scalar_one_or_none()
-            
-            if not provider_model:
-                return False
-            
-            provider_model.is_delete = 1  # type: ignore
-            provider_model.updated_at = datetime.now()  # type: ignore
+            user_id = result.scalar_one_or_none()
+            if user_id is not None:
+                self._invalidate_embedding_configs(user_id)
             await self._session.commit()
-            return True
+            return user_id is not None
             
         except Exception as e:
             await self._session.rollback()
@@ -165,15 +211,11 @@ class ProviderRepositoryImpl(ProviderRepository):
     async def exists(self, user_id: str, provider_name: str) -> bool:
         """检查Provider是否存在（只检查未删除的记录）"""
         try:
-            stmt = select(ProviderModel.id).where(
-                and_(
-                    ProviderModel.user_id == user_id,
-                    ProviderModel.provider == provider_name.lower(),
-                    ProviderModel.is_delete == 0
-                )
+            result = await self._session.execute(
+                _EXISTS_STMT,
+                {'user_id': user_id, 'provider': provider_name.lower()}
             )
-            result = await self._session.execute(stmt)
-            return result.scalar_one_or_none() is not None
+            return bool(result.scalar())
             
         except Exception as e:
             raise RepositoryError(f"检查Provider存在性失败: {str(e)}")
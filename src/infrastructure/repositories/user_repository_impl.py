@@ -1,12 +1,33 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import bindparam, delete, exists, select, or_, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload
 
 from src.domain.user.repositories.user_repository import UserRepository
 from src.domain.user.entities.user import User
 from src.domain.user.value_objects import Username, Email, HashedPassword, UserStatus
 from src.infrastructure.models.user_models import UserModel
+from src.infrastructure.utils.db_errors import integrity_error_detail
+
+# 查询语句在模块加载时构建一次，调用时只绑定参数
+_FIND_BY_USERNAME_STMT = select(UserModel).where(UserModel.username == bindparam('username'))
+_FIND_BY_EMAIL_STMT = select(UserModel).where(UserModel.email == bindparam('email'))
+_FIND_BY_USERNAME_OR_EMAIL_STMT = select(UserModel).where(
+    or_(
+        UserModel.username == bindparam('username_or_email'),
+        UserModel.email == bindparam('username_or_email')
+    )
+)
+_EXISTS_BY_USERNAME_STMT = select(exists().where(UserModel.username == bindparam('username')))
+_EXISTS_BY_EMAIL_STMT = select(exists().where(UserModel.email == bindparam('email')))
+# 用户名与邮箱均唯一，命中的行最多两条
+_FIND_USERNAME_OR_EMAIL_TAKEN_STMT = select(UserModel.username, UserModel.email).where(
+    or_(
+        UserModel.username == bindparam('username'),
+        UserModel.email == bindparam('email')
+    )
+)
 
 
 class UserRepositoryImpl(UserRepository):
@@ -20,15 +41,19 @@ class UserRepositoryImpl(UserRepository):
         user_model = self._to_model(user)
         
         try:
+            # flush 时 INSERT ... RETURNING 带回服务端默认值（eager_defaults 默认 "auto"），
+            # 提交前转换为实体，不再提交后 refresh 多查一次
             self.session.add(user_model)
+            await self.session.flush()
+            saved_user = self._to_entity(user_model)
             await self.session.commit()
-            await self.session.refresh(user_model)
-            return self._to_entity(user_model)
+            return saved_user
         except IntegrityError as e:
             await self.session.rollback()
-            if 'username' in str(e):
+            violated = integrity_error_detail(e)
+            if 'username' in violated:
                 raise ValueError(f"用户名 '{user.username.value}' 已存在")
-            elif 'email' in str(e):
+            elif 'email' in violated:
                 raise ValueError(f"邮箱 '{user.email.value}' 已存在")
             else:
                 raise ValueError("保存用户失败：数据完整性错误")
@@ -38,78 +63,88 @@ class UserRepositoryImpl(UserRepository):
     
     async def find_by_id(self, user_id: str) -> Optional[User]:
         """根据ID查找用户"""
-        stmt = select(UserModel).where(UserModel.id == user_id)
-        result = await self.session.execute(stmt)
-        user_model = result.scalar_one_or_none()
+        # 主键查询走 session.get：先查身份映射，命中时不发SQL
+        user_model = await self.session.get(UserModel, user_id)
         
         return self._to_entity(user_model) if user_model else None
     
     async def find_by_username(self, username: Username) -> Optional[User]:
         """根据用户名查找用户"""
-        stmt = select(UserModel).where(UserModel.username == username.value)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_FIND_BY_USERNAME_STMT, {'username': username.value})
         user_model = result.scalar_one_or_none()
         
         return self._to_entity(user_model) if user_model else None
     
     async def find_by_email(self, email: Email) -> Optional[User]:
         """根据邮箱查找用户"""
-        stmt = select(UserModel).where(UserModel.email == email.value)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_FIND_BY_EMAIL_STMT, {'email': email.value})
         user_model = result.scalar_one_or_none()
         
         return self._to_entity(user_model) if user_model else None
     
     async def find_by_username_or_email(self, username_or_email: str) -> Optional[User]:
         """根据用户名或邮箱查找用户"""
-        stmt = select(UserModel).where(
-            or_(
-                UserModel.username == username_or_email,
-                UserModel.email == username_or_email
-            )
+        result = await self.session.execute(
+            _FIND_BY_USERNAME_OR_EMAIL_STMT, {'username_or_email': username_or_email}
         )
-        result = await self.session.execute(stmt)
         user_model = result.scalar_one_or_none()
         
         return self._to_entity(user_model) if user_model else None
     
     async def exists_by_username(self, username: Username) -> bool:
         """检查用户名是否存在"""
-        stmt = select(UserModel.id).where(UserModel.username == username.value)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
+        result = await self.session.execute(_EXISTS_BY_USERNAME_STMT, {'username': username.value})
+        return bool(result.scalar())
     
     async def exists_by_email(self, email: Email) -> bool:
         """检查邮箱是否存在"""
-        stmt = select(UserModel.id).where(UserModel.email == email.value)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
+        result = await self.session.execute(_EXISTS_BY_EMAIL_STMT, {'email': email.value})
+        return bool(result.scalar())
+    
+    async def check_username_email_taken(self, username: Username, email: Email) -> Tuple[bool, bool]:
+        """一次查询同时检查用户名与邮箱是否已被占用"""
+        result = await self.session.execute(
+            _FIND_USERNAME_OR_EMAIL_TAKEN_STMT,
+            {'username': username.value, 'email': email.value}
+        )
+        username_taken = email_taken = False
+        for row_username, row_email in result:
+            username_taken = username_taken or row_username == username.value
+            email_taken = email_taken or row_email == email.value
+        return username_taken, email_taken
     
     async def update(self, user: User) -> User:
         """更新用户"""
-        stmt = select(UserModel).where(UserModel.id == user.id)
-        result = await self.session.execute(stmt)
-        user_model = result.scalar_one_or_none()
-        
-        if not user_model:
-            raise ValueError(f"用户不存在: {user.id}")
-        
-        # 更新字段
-        user_model.username = user.username.value
-        user_model.email = user.email.value
-        user_model.password_hash = user.password_hash.hash_value
-        user_model.status = int(user.status)
-        user_model.updated_at = user.updated_at
+        # 单条 UPDATE ... RETURNING 完成更新并取回最新行，不再先查询再修改
+        stmt = update(UserModel).where(
+            UserModel.id == user.id
+        ).values(
+            username=user.username.value,
+            email=user.email.value,
+            password_hash=user.password_hash.hash_value,
+            status=int(user.status),
+            updated_at=user.updated_at
+        ).returning(UserModel)
         
         try:
+            result = await self.session.execute(stmt)
+            user_model = result.scalar_one_or_none()
+            if not user_model:
+                await self.session.rollback()
+                raise ValueError(f"用户不存在: {user.id}")
+            
+            # 提交前转换：提交后对象过期，再访问属性会触发隐式加载
+            updated_user = self._to_entity(user_model)
             await self.session.commit()
-            await self.session.refresh(user_model)
-            return self._to_entity(user_model)
+            return updated_user
+        except ValueError:
+            raise
         except IntegrityError as e:
             await self.session.rollback()
-            if 'username' in str(e):
+            violated = integrity_error_detail(e)
+            if 'username' in violated:
                 raise ValueError(f"用户名 '{user.username.value}' 已存在")
-            elif 'email' in str(e):
+            elif 'email' in violated:
                 raise ValueError(f"邮箱 '{user.email.value}' 已存在")
             else:
                 raise ValueError("更新用户失败：数据完整性错误")
@@ -119,24 +154,23 @@ class UserRepositoryImpl(UserRepository):
     
     async def delete(self, user_id: str) -> bool:
         """删除用户"""
-        stmt = select(UserModel).where(UserModel.id == user_id)
-        result = await self.session.execute(stmt)
-        user_model = result.scalar_one_or_none()
-        
-        if not user_model:
-            return False
+        # 单条 DELETE，以影响行数判断记录是否存在
+        stmt = delete(UserModel).where(
+            UserModel.id == user_id
+        ).execution_options(synchronize_session=False)
         
         try:
-            await self.session.delete(user_model)
+            result = await self.session.execute(stmt)
             await self.session.commit()
-            return True
+            return result.rowcount > 0
         except Exception as e:
             await self.session.rollback()
             raise ValueError(f"删除用户失败: {str(e)}")
     
     async def find_all(self, limit: int = 100, offset: int = 0) -> List[User]:
         """查找所有用户（分页）"""
-        stmt = select(UserModel).offset(offset).limit(limit)
+        # 列表查询禁止隐式懒加载：异步会话下的懒加载会在运行时报错，在此提前暴露
+        stmt = select(UserModel).options(raiseload('*')).offset(offset).limit(limit)
         result = await self.session.execute(stmt)
         user_models = result.scalars().all()
         
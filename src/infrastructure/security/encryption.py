@@ -2,17 +2,64 @@
 API Key 加密服务
 """
 import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import os
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
+
+# 解密结果缓存容量与有效期（秒）
+_DECRYPT_CACHE_SIZE = 1024
+_DECRYPT_CACHE_TTL = 600
+
+# 掩码结果缓存容量（掩码不含敏感信息且由密文唯一确定，无需过期）
+_MASK_CACHE_SIZE = 4096
+
+# AES-GCM 密文前缀（无前缀的为旧版 Fernet 密文）与随机数长度
+_AESGCM_PREFIX = 'v2:'
+_AESGCM_NONCE_SIZE = 12
+
+
+@lru_cache(maxsize=8)
+def _build_ciphers(secret_key: str) -> Tuple[Fernet, AESGCM]:
+    """
+    由密钥派生加解密实例
+    PBKDF2 迭代10万次，按密钥缓存结果，重复创建 EncryptionService 时不再重新派生
+    
+    Returns:
+        (Fernet, AESGCM)：Fernet 仅用于解密旧版密文；AES-GCM 密钥由主密钥经 HKDF 派生，不与 Fernet 共用
+    """
+    # 使用 PBKDF2 从密钥生成加密密钥
+    password = secret_key.encode()
+    salt = b'salt_'  # 在生产环境中应该使用随机盐
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    master_key = kdf.derive(password)
+    aead_key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b'api-key-aes-gcm',
+    ).derive(master_key)
+    return Fernet(base64.urlsafe_b64encode(master_key)), AESGCM(aead_key)
 
 
 class EncryptionService:
     """
     API Key 加密服务
-    使用 Fernet 对称加密
+    使用 AES-256-GCM 加密（密文格式：'v2:' + urlsafe_base64(随机数 + 密文 + 认证标签)），
+    兼容解密旧版 Fernet 密文
     """
     
     def __init__(self, secret_key: Optional[str] = None):
@@ -23,23 +70,14 @@ class EncryptionService:
             secret_key: 可选的密钥，如果不提供则从环境变量获取
         """
         self._secret_key = secret_key or os.getenv('ENCRYPTION_SECRET_KEY', 'default-secret-key-for-development')
-        self._fernet = self._get_fernet()
-    
-    def _get_fernet(self) -> Fernet:
-        """
-        获取 Fernet 实例
-        """
-        # 使用 PBKDF2 从密钥生成加密密钥
-        password = self._secret_key.encode()
-        salt = b'salt_'  # 在生产环境中应该使用随机盐
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password))
-        return Fernet(key)
+        self._fernet, self._aead = _build_ciphers(self._secret_key)
+        # 密文摘要 -> (过期时间, 明文)，按最近使用顺序排列
+        self._decrypt_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        # decrypt 可能在线程池中并发调用，缓存读写需加锁
+        self._decrypt_cache_lock = threading.Lock()
+        # 密文摘要 -> 掩码，按最近使用顺序排列
+        self._mask_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._mask_cache_lock = threading.Lock()
     
     def encrypt(self, plaintext: str) -> str:
         """
@@ -49,13 +87,14 @@ class EncryptionService:
             plaintext: 明文API Key
             
         Returns:
-            加密后的API Key（base64编码）
+            加密后的API Key（'v2:' 前缀 + base64编码）
         """
         if not plaintext:
             raise ValueError("明文不能为空")
         
-        encrypted_bytes = self._fernet.encrypt(plaintext.encode('utf-8'))
-        return base64.urlsafe_b64encode(encrypted_bytes).decode('utf-8')
+        nonce = os.urandom(_AESGCM_NONCE_SIZE)
+        encrypted_bytes = self._aead.encrypt(nonce, plaintext.encode('utf-8'), None)
+        return _AESGCM_PREFIX + base64.urlsafe_b64encode(nonce + encrypted_bytes).decode('ascii')
     
     def decrypt(self, encrypted_text: str) -> str:
         """
@@ -70,12 +109,87 @@ class EncryptionService:
         if not encrypted_text:
             raise ValueError("加密文本不能为空")
         
+        # 相同密文在有效期内直接返回缓存的明文，省去Fernet解密
+        cached = self.get_cached_plaintext(encrypted_text)
+        if cached is not None:
+            return cached
+        
+        cache_key = self._decrypt_cache_key(encrypted_text)
+        now = time.monotonic()
         try:
-            encrypted_bytes = base64.urlsafe_b64decode(encrypted_text.encode('utf-8'))
-            decrypted_bytes = self._fernet.decrypt(encrypted_bytes)
-            return decrypted_bytes.decode('utf-8')
+            if encrypted_text.startswith(_AESGCM_PREFIX):
+                data = base64.urlsafe_b64decode(encrypted_text[len(_AESGCM_PREFIX):])
+                decrypted_bytes = self._aead.decrypt(
+                    data[:_AESGCM_NONCE_SIZE], data[_AESGCM_NONCE_SIZE:], None
+                )
+            else:
+                # 旧版密文：base64(Fernet token)
+                encrypted_bytes = base64.urlsafe_b64decode(encrypted_text.encode('utf-8'))
+                decrypted_bytes = self._fernet.decrypt(encrypted_bytes)
+            plaintext = decrypted_bytes.decode('utf-8')
         except Exception as e:
             raise ValueError(f"解密失败: {str(e)}")
+        
+        with self._decrypt_cache_lock:
+            self._decrypt_cache[cache_key] = (now + _DECRYPT_CACHE_TTL, plaintext)
+            self._decrypt_cache.move_to_end(cache_key)
+            if len(self._decrypt_cache) > _DECRYPT_CACHE_SIZE:
+                self._decrypt_cache.popitem(last=False)
+        return plaintext
+    
+    def decrypt_many(self, encrypted_texts: Sequence[str]) -> List[Optional[str]]:
+        """
+        批量解密API Key
+        在一个循环内完成整批解密，单条失败不影响其他条目
+        
+        Args:
+            encrypted_texts: 加密后的API Key列表
+            
+        Returns:
+            与输入一一对应的明文列表，解密失败的位置为None
+        """
+        decrypt = self.decrypt
+        plaintexts: List[Optional[str]] = []
+        append = plaintexts.append
+        for encrypted_text in encrypted_texts:
+            try:
+                append(decrypt(encrypted_text))
+            except ValueError:
+                append(None)
+        return plaintexts
+    
+    def get_cached_plaintext(self, encrypted_text: str) -> Optional[str]:
+        """
+        查询解密结果缓存，不执行解密
+        供异步调用方在提交线程池前先走缓存，命中时无需线程切换
+        
+        Args:
+            encrypted_text: 加密后的API Key
+            
+        Returns:
+            缓存中未过期的明文，未命中时为None
+        """
+        cache_key = self._decrypt_cache_key(encrypted_text)
+        with self._decrypt_cache_lock:
+            cached = self._decrypt_cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._decrypt_cache.move_to_end(cache_key)
+                return cached[1]
+        return None
+    
+    @staticmethod
+    def _decrypt_cache_key(encrypted_text: str) -> bytes:
+        """解密缓存键：密文的blake2b摘要，避免缓存中保留完整密文"""
+        return hashlib.blake2b(encrypted_text.encode('utf-8'), digest_size=16).digest()
+    
+    def clear_decrypt_cache(self) -> None:
+        """
+        清空解密结果缓存（密钥轮换后调用）
+        """
+        with self._decrypt_cache_lock:
+            self._decrypt_cache.clear()
+        with self._mask_cache_lock:
+            self._mask_cache.clear()
     
     def mask_api_key(self, api_key: str, show_length: int = 4) -> str:
         """
@@ -95,6 +209,39 @@ class EncryptionService:
             return "*" * len(api_key)
         
         return f"***{api_key[-show_length:]}"
+    
+    def mask_encrypted_many(self, encrypted_texts: Sequence[str]) -> List[str]:
+        """
+        批量生成加密API Key的掩码，用于列表展示
+        掩码按密文缓存，同一密文只在首次展示时解密一次，之后不再执行解密
+        
+        Args:
+            encrypted_texts: 加密后的API Key列表
+            
+        Returns:
+            与输入一一对应的掩码列表，解密失败的位置为 "***"
+        """
+        masks: List[str] = []
+        append = masks.append
+        for encrypted_text in encrypted_texts:
+            cache_key = self._decrypt_cache_key(encrypted_text)
+            with self._mask_cache_lock:
+                mask = self._mask_cache.get(cache_key)
+                if mask is not None:
+                    self._mask_cache.move_to_end(cache_key)
+            if mask is None:
+                try:
+                    mask = self.mask_api_key(self.decrypt(encrypted_text))
+                except ValueError:
+                    # 解密失败不缓存，密钥修复后可重新生成
+                    append("***")
+                    continue
+                with self._mask_cache_lock:
+                    self._mask_cache[cache_key] = mask
+                    if len(self._mask_cache) > _MASK_CACHE_SIZE:
+                        self._mask_cache.popitem(last=False)
+            append(mask)
+        return masks
 
 
 # 全局加密服务实例
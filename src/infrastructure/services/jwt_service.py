@@ -1,10 +1,20 @@
-import jwt
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional, Dict, Any
 
+from jose import jwt
+from jose.exceptions import JWTError
+
 from src.domain.user.entities.user import User
 
+# 令牌类型声明
+_ACCESS_TOKEN_TYPE = 'access'
+_REFRESH_TOKEN_TYPE = 'refresh'
+
+# 校验 exp/nbf/iat 时允许的时钟偏差（秒）
+_LEEWAY_SECONDS = int(os.getenv('JWT_LEEWAY_SECONDS', '10'))
+
 
 class JWTService:
     """JWT服务 - 负责JWT令牌的生成和验证"""
@@ -39,10 +49,12 @@ class JWTService:
         Returns:
             JWT访问令牌
         """
+        # exp/iat 直接使用 NumericDate 整数秒，不构建datetime
+        now = int(time.time())
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
+            expire = now + self.access_token_expire_minutes * 60
         
         payload = {
             'sub': user.id,  # subject - 用户ID
@@ -50,8 +62,8 @@ class JWTService:
             'email': user.email.value,
             'status': int(user.status),
             'exp': expire,  # expiration time
-            'iat': datetime.utcnow(),  # issued at
-            'type': 'access'
+            'iat': now,  # issued at
+            'type': _ACCESS_TOKEN_TYPE
         }
         
         return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
@@ -66,16 +78,17 @@ class JWTService:
         Returns:
             JWT刷新令牌
         """
+        now = int(time.time())
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
+            expire = now + self.refresh_token_expire_days * 86400
         
         payload = {
             'sub': user.id,
             'exp': expire,
-            'iat': datetime.utcnow(),
-            'type': 'refresh'
+            'iat': now,
+            'type': _REFRESH_TOKEN_TYPE
         }
         
         return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
@@ -90,12 +103,13 @@ class JWTService:
             解码后的载荷，验证失败返回None
         """
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
-        except jwt.ExpiredSignatureError:
-            return None  # 令牌已过期
-        except jwt.InvalidTokenError:
-            return None  # 令牌无效
+            # 由python-jose校验签名、算法及 exp/nbf/iat 声明
+            return jwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm],
+                options={'leeway': _LEEWAY_SECONDS}
+            )
+        except JWTError:
+            return None  # 令牌无效或已过期
     
     def get_user_id_from_token(self, token: str) -> Optional[str]:
         """从令牌中获取用户ID
@@ -120,13 +134,7 @@ class JWTService:
         Returns:
             是否过期
         """
-        try:
-            jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return False
-        except jwt.ExpiredSignatureError:
-            return True
-        except jwt.InvalidTokenError:
-            return True
+        return self.verify_token(token) is None
     
     def refresh_access_token(self, refresh_token: str) -> Optional[str]:
         """使用刷新令牌生成新的访问令牌
@@ -138,7 +146,7 @@ class JWTService:
             新的访问令牌，验证失败返回None
         """
         payload = self.verify_token(refresh_token)
-        if not payload or payload.get('type') != 'refresh':
+        if not payload or payload.get('type') != _REFRESH_TOKEN_TYPE:
             return None
         
         user_id = payload.get('sub')
@@ -148,11 +156,12 @@ class JWTService:
         # 这里需要从数据库重新获取用户信息
         # 在实际使用中，应该注入用户仓储来获取用户
         # 暂时返回一个简化的令牌
+        now = int(time.time())
         new_payload = {
             'sub': user_id,
-            'exp': datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes),
-            'iat': datetime.utcnow(),
-            'type': 'access'
+            'exp': now + self.access_token_expire_minutes * 60,
+            'iat': now,
+            'type': _ACCESS_TOKEN_TYPE
         }
         
         return jwt.encode(new_payload, self.secret_key, algorithm=self.algorithm)
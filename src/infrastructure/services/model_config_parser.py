@@ -3,14 +3,72 @@ YAML模型配置文件解析器
 用于解析models目录下的yaml配置文件并转换为数据库模型格式
 """
 
+import json
+import mmap
 import os
+import sys
+import threading
+import types
 import yaml
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
+# 优先使用libyaml实现的C加载器（与safe_load同样只构造基本类型），未编译libyaml时退回纯Python实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
-@dataclass
+# Python 3.10+ 的 dataclass 支持 slots=True，去掉实例 __dict__；3.9 下退化为普通 dataclass
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 合并解析结果缓存文件名（位于models目录下）
+_SCAN_CACHE_FILE = '.models_cache.json'
+
+# 并行解析YAML文件的线程数（读文件与libyaml解析期间释放GIL）
+_PARSE_WORKERS = min(16, (os.cpu_count() or 4) * 2)
+
+# 不小于该大小的YAML文件通过mmap交给解析器，更小的文件直接读取（mmap按页映射，小文件得不偿失）
+_MMAP_MIN_SIZE = 4096
+
+# 各提供商的默认base_url
+_DEFAULT_BASE_URLS = types.MappingProxyType({
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com",
+    "deepseek": "https://api.deepseek.com/v1",
+    "siliconflow": "https://api.siliconflow.cn/v1"
+})
+
+# 由capabilities推断子类型时的优先级
+_SUBTYPE_PRIORITY = ("chat", "completion", "embedding", "rerank")
+
+
+def _intern(value: Any) -> Any:
+    """驻留字符串：同一提供商/类型的所有模型共享同一个字符串对象"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def load_yaml_file(yaml_path: Any) -> Any:
+    """
+    读取并解析YAML文件
+    较大的文件以只读mmap交给解析器，省去经Python IO层逐块读取与解码的拷贝
+    
+    Args:
+        yaml_path: YAML文件路径
+        
+    Returns:
+        解析结果
+    """
+    with open(yaml_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+            return yaml.load(f.read(), Loader=_YamlLoader)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return yaml.load(mm, Loader=_YamlLoader)
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ModelConfig:
     """模型配置数据类"""
     model_name: str
@@ -38,17 +96,10 @@ class ModelConfig:
         """获取模型类型和子类型"""
         model_type = self.model_type.lower()
         
-        # 根据capabilities推断子类型
-        subtype = None
-        if "chat" in self.capabilities:
-            subtype = "chat"
-        elif "completion" in self.capabilities:
-            subtype = "completion"
-        elif "embedding" in self.capabilities:
-            subtype = "embedding"
-        elif "rerank" in self.capabilities:
-            subtype = "rerank"
-            
+        # 根据capabilities推断子类型，按优先级取第一个命中项
+        capabilities = set(self.capabilities)
+        subtype = next((s for s in _SUBTYPE_PRIORITY if s in capabilities), None)
+        
         return model_type, subtype
 
 
@@ -63,10 +114,20 @@ class ModelConfigParser:
             models_dir: models目录路径
         """
         self.models_dir = Path(models_dir)
+        # 文件路径 -> (修改时间ns, 文件大小, 解析结果)；文件未变化时直接复用解析结果（包括解析失败的None）
+        self._cache: Dict[Path, Tuple[int, int, Optional[ModelConfig]]] = {}
+        # (models目录修改时间ns, 提供商配置)；增删提供商目录会改变models目录的修改时间
+        self._provider_configs: Optional[Tuple[int, Dict[str, Dict[str, Any]]]] = None
+    
+    def invalidate(self) -> None:
+        """清空解析结果缓存"""
+        self._cache.clear()
+        self._provider_configs = None
         
     def parse_yaml_file(self, yaml_path: Path) -> Optional[ModelConfig]:
         """
         解析单个YAML文件
+        文件的修改时间与大小未变化时返回缓存的解析结果，不再重新读取和解析
         
         Args:
             yaml_path: YAML文件路径
@@ -75,8 +136,24 @@ class ModelConfigParser:
             解析后的模型配置，解析失败返回None
         """
         try:
-            with open(yaml_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            st = yaml_path.stat()
+        except OSError as e:
+            self._cache.pop(yaml_path, None)
+            print(f"解析YAML文件失败 {yaml_path}: {e}")
+            return None
+        
+        cached = self._cache.get(yaml_path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        
+        config = self._parse_yaml_file(yaml_path)
+        self._cache[yaml_path] = (st.st_mtime_ns, st.st_size, config)
+        return config
+    
+    def _parse_yaml_file(self, yaml_path: Path) -> Optional[ModelConfig]:
+        """读取并解析单个YAML文件，解析失败返回None"""
+        try:
+            data = load_yaml_file(yaml_path)
                 
             # 验证必需字段
             required_fields = ['model', 'model_type', 'provider']
@@ -87,8 +164,8 @@ class ModelConfigParser:
                     
             return ModelConfig(
                 model_name=data['model'],
-                model_type=data['model_type'],
-                provider=data['provider'],
+                model_type=_intern(data['model_type']),
+                provider=_intern(data['provider']),
                 description=data.get('description', ''),
                 capabilities=data.get('capabilities', []),
                 context_length=data.get('context_length', 0),
@@ -101,6 +178,26 @@ class ModelConfigParser:
             print(f"解析YAML文件失败 {yaml_path}: {e}")
             return None
     
+    def _iter_provider_dirs(self) -> List[Path]:
+        """列出提供商目录（跳过隐藏目录与__pycache__）"""
+        # scandir的目录项自带类型信息，判断是否为目录无需逐项stat
+        with os.scandir(self.models_dir) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.') and entry.name != '__pycache__'
+            ]
+    
+    def _list_yaml_files(self) -> List[Path]:
+        """列出所有提供商目录下的YAML文件"""
+        yaml_files: List[Path] = []
+        for provider_dir in self._iter_provider_dirs():
+            with os.scandir(provider_dir) as entries:
+                yaml_files.extend(
+                    Path(entry.path) for entry in entries
+                    if entry.name.endswith('.yaml') and not entry.name.startswith('.') and entry.is_file()
+                )
+        return yaml_files
+    
     def scan_all_models(self) -> List[ModelConfig]:
         """
         扫描所有YAML配置文件
@@ -109,54 +206,100 @@ class ModelConfigParser:
             所有解析成功的模型配置列表
         """
         model_configs = []
+        yaml_files = self._list_yaml_files()
         
-        # 遍历所有子目录
-        for provider_dir in self.models_dir.iterdir():
-            if not provider_dir.is_dir() or provider_dir.name.startswith('.') or provider_dir.name == '__pycache__':
-                continue
-                
-            # 扫描提供商目录下的所有yaml文件
-            for yaml_file in provider_dir.glob('*.yaml'):
-                config = self.parse_yaml_file(yaml_file)
-                if config:
-                    model_configs.append(config)
-                    print(f"成功解析: {yaml_file}")
+        # 并行解析提供商目录下的所有yaml文件（结果保持文件顺序）
+        if len(yaml_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(_PARSE_WORKERS, len(yaml_files))) as executor:
+                configs = list(executor.map(self.parse_yaml_file, yaml_files))
+        else:
+            configs = [self.parse_yaml_file(yaml_file) for yaml_file in yaml_files]
+        
+        for yaml_file, config in zip(yaml_files, configs):
+            if config:
+                model_configs.append(config)
+                print(f"成功解析: {yaml_file}")
+        
+        # 丢弃已删除文件的缓存条目
+        # （先复制键列表：扫描可能在多个工作线程中并发进行）
+        current = set(yaml_files)
+        for stale in [path for path in list(self._cache) if path not in current]:
+            self._cache.pop(stale, None)
                     
         return model_configs
     
+    def scan_all_models_cached(self) -> List[ModelConfig]:
+        """
+        扫描所有YAML配置文件，优先读取合并后的JSON缓存文件
+        缓存中记录了各YAML文件的(相对路径, 修改时间, 大小)，与当前文件一致（含增删）时直接加载，
+        否则重新扫描并重写缓存；冷启动只需stat各文件并读取一个JSON文件
+        
+        Returns:
+            所有解析成功的模型配置列表
+        """
+        cache_path = self.models_dir / _SCAN_CACHE_FILE
+        fingerprint = []
+        for yaml_file in sorted(self._list_yaml_files()):
+            st = yaml_file.stat()
+            fingerprint.append([yaml_file.relative_to(self.models_dir).as_posix(), st.st_mtime_ns, st.st_size])
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['fingerprint'] == fingerprint:
+                return [
+                    ModelConfig(**{**row, 'model_type': _intern(row['model_type']), 'provider': _intern(row['provider'])})
+                    for row in cached['models']
+                ]
+        except (OSError, ValueError, TypeError, KeyError):
+            # 缓存文件不存在或内容无效时重新扫描
+            pass
+        
+        model_configs = self.scan_all_models()
+        tmp_path = cache_path.with_name(f"{_SCAN_CACHE_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'fingerprint': fingerprint, 'models': [asdict(config) for config in model_configs]},
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 目录不可写时只是失去缓存，不影响本次结果
+            print(f"写入模型配置缓存失败 {cache_path}: {e}")
+        return model_configs
+    
     def get_provider_configs(self) -> Dict[str, Dict[str, Any]]:
         """
         获取提供商配置信息
         
         Returns:
-            提供商配置字典
+            提供商配置字典（缓存对象，调用方不应修改）
         """
+        # models目录未变化时直接返回上次的结果，省去目录遍历
+        mtime_ns = self.models_dir.stat().st_mtime_ns
+        if self._provider_configs is not None and self._provider_configs[0] == mtime_ns:
+            return self._provider_configs[1]
+        
         # 这里可以扩展为从配置文件读取提供商的默认配置
         # 目前返回基本的提供商信息
         providers = {}
         
-        for provider_dir in self.models_dir.iterdir():
-            if not provider_dir.is_dir() or provider_dir.name.startswith('.') or provider_dir.name == '__pycache__':
-                continue
-                
+        for provider_dir in self._iter_provider_dirs():
             provider_name = provider_dir.name
             providers[provider_name] = {
                 "name": provider_name,
                 "base_url": self._get_default_base_url(provider_name),
                 "description": f"{provider_name.title()} AI Provider"
             }
-            
+        
+        self._provider_configs = (mtime_ns, providers)
         return providers
     
     def _get_default_base_url(self, provider: str) -> Optional[str]:
         """获取提供商的默认base_url"""
-        default_urls = {
-            "openai": "https://api.openai.com/v1",
-            "anthropic": "https://api.anthropic.com",
-            "deepseek": "https://api.deepseek.com/v1",
-            "siliconflow": "https://api.siliconflow.cn/v1"
-        }
-        return default_urls.get(provider.lower())
+        return _DEFAULT_BASE_URLS.get(provider.lower())
 
 
 if __name__ == "__main__":
@@ -2,10 +2,19 @@
 模型配置读取服务
 """
 import os
-import yaml
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from .model_config_parser import load_yaml_file
+
+# 并行读取各提供商配置的线程数
+_LOAD_WORKERS = min(16, (os.cpu_count() or 4) * 2)
+
+# 默认模型配置目录
+_DEFAULT_MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+
+
 class ModelConfigService:
     """
     模型配置服务，用于读取模型配置文件
@@ -18,11 +27,13 @@ class ModelConfigService:
         Args:
             models_dir: 模型配置文件目录路径
         """
-        if models_dir is None:
-            current_dir = Path(__file__).parent.parent
-            self.models_dir = current_dir / "models"
-        else:
-            self.models_dir = Path(models_dir)
+        self.models_dir = _DEFAULT_MODELS_DIR if models_dir is None else Path(models_dir)
+        # (目录修改时间ns, 提供商列表)；增删提供商目录会改变models目录的修改时间
+        self._providers: Optional[Tuple[int, List[str]]] = None
+    
+    def refresh(self) -> None:
+        """清空提供商列表缓存"""
+        self._providers = None
     
     def get_provider_models(self, provider: str) -> List[Dict[str, Any]]:
         """
@@ -36,16 +47,21 @@ class ModelConfigService:
         """
         provider_dir = self.models_dir / provider
         
-        if not provider_dir.exists():
+        if not provider_dir.is_dir():
             return []
         
         models = []
-        for yaml_file in provider_dir.glob("*.yaml"):
+        with os.scandir(provider_dir) as entries:
+            yaml_files = [
+                entry.path for entry in entries
+                if entry.name.endswith('.yaml') and not entry.name.startswith('.') and entry.is_file()
+            ]
+        
+        for yaml_file in yaml_files:
             try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    if config:
-                        models.append(config)
+                config = load_yaml_file(yaml_file)
+                if config:
+                    models.append(config)
             except Exception as e:
                 print(f"Error loading model config {yaml_file}: {e}")
         
@@ -75,15 +91,17 @@ class ModelConfigService:
         Returns:
             提供商名称列表
         """
-        if not self.models_dir.exists():
+        try:
+            mtime_ns = self.models_dir.stat().st_mtime_ns
+        except OSError:
             return []
         
-        providers = []
-        for item in self.models_dir.iterdir():
-            if item.is_dir():
-                providers.append(item.name)
-        
-        return sorted(providers)
+        # 目录未变化时复用上次的列表
+        if self._providers is None or self._providers[0] != mtime_ns:
+            # scandir的目录项自带类型信息，判断是否为目录无需逐项stat
+            with os.scandir(self.models_dir) as entries:
+                self._providers = (mtime_ns, sorted(entry.name for entry in entries if entry.is_dir()))
+        return list(self._providers[1])
     
     def get_all_models(self) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -92,11 +110,13 @@ class ModelConfigService:
         Returns:
             按提供商分组的模型配置字典
         """
-        all_models = {}
-        for provider in self.get_all_providers():
-            all_models[provider] = self.get_provider_models(provider)
+        providers = self.get_all_providers()
+        if not providers:
+            return {}
         
-        return all_models
+        # 各提供商目录并行读取
+        with ThreadPoolExecutor(max_workers=min(_LOAD_WORKERS, len(providers))) as executor:
+            return dict(zip(providers, executor.map(self.get_provider_models, providers)))
 
 
 # 全局模型配置服务实例
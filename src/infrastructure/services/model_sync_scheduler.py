@@ -7,10 +7,6 @@ import asyncio
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 
 from .model_sync_service import ModelSyncService
 
@@ -28,6 +24,10 @@ class ModelSyncScheduler:
         """
         self.models_dir = models_dir
         self.system_user_id = system_user_id
+        # APScheduler在创建调度器时才导入，只导入本模块（如读取同步状态）时不承担其导入开销
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+        
         self.sync_service = ModelSyncService(models_dir, system_user_id)
         self.scheduler = AsyncIOScheduler()
         self.last_sync_result: Optional[Dict[str, Any]] = None
@@ -53,8 +53,11 @@ class ModelSyncScheduler:
         try:
             self.logger.info("开始执行模型同步任务...")
             
+            # 扫描一次配置文件，同步与清理共用
+            model_configs = await asyncio.to_thread(self.sync_service.parser.scan_all_models_cached)
+            
             # 执行同步
-            result = await self.sync_service.sync_all_models()
+            result = await self.sync_service.sync_all_models(model_configs)
             self.last_sync_result = result
             self.last_sync_time = datetime.now()
             
@@ -70,7 +73,7 @@ class ModelSyncScheduler:
                     self.logger.error(f"同步错误: {error}")
             
             # 清理已删除的模型
-            clean_result = await self.sync_service.clean_deleted_models()
+            clean_result = await self.sync_service.clean_deleted_models(model_configs)
             if clean_result['cleaned_models'] > 0:
                 self.logger.info(f"清理了 {clean_result['cleaned_models']} 个已删除的模型")
                 
@@ -89,6 +92,8 @@ class ModelSyncScheduler:
             cron_expression: Cron表达式，默认每6小时执行一次
             run_immediately: 是否立即执行一次同步
         """
+        from apscheduler.triggers.cron import CronTrigger
+        
         try:
             # 添加定时任务
             self.scheduler.add_job(
@@ -122,6 +127,8 @@ class ModelSyncScheduler:
             interval_minutes: 间隔分钟数
             run_immediately: 是否立即执行一次同步
         """
+        from apscheduler.triggers.interval import IntervalTrigger
+        
         try:
             # 添加间隔任务
             self.scheduler.add_job(
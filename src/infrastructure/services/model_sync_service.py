@@ -5,15 +5,55 @@
 
 import asyncio
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, update, delete, bindparam, func, tuple_, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
 
 from ..database import get_async_session
 from ..models.provider_models import ProviderModel, ModelModel
 from .model_config_parser import ModelConfigParser, ModelConfig
 
+# 可选使用orjson序列化模型元数据（一次C调用完成编码，非ASCII字符原样输出），未安装时回退到json
+try:
+    import orjson
+    
+    def _dumps_metadata(metadata: Dict[str, Any]) -> str:
+        return orjson.dumps(metadata).decode('utf-8')
+except ImportError:
+    def _dumps_metadata(metadata: Dict[str, Any]) -> str:
+        return json.dumps(metadata, ensure_ascii=False)
+
+# 软删除不在当前配置中的模型：当前配置以两个等长数组参数绑定，经unnest展开为(provider_name, model_name)集合
+_CURRENT_MODELS = func.unnest(
+    bindparam('providers', type_=ARRAY(String)),
+    bindparam('model_names', type_=ARRAY(String))
+).table_valued('provider_name', 'model_name').render_derived()
+_SOFT_DELETE_MISSING_MODELS_STMT = update(ModelModel).where(
+    ModelModel.is_delete == 0,
+    tuple_(ModelModel.provider_name, ModelModel.model_name).notin_(
+        select(_CURRENT_MODELS.c.provider_name, _CURRENT_MODELS.c.model_name)
+    )
+).values(is_delete=1).execution_options(synchronize_session=False)
+
+# 按提供商统计未删除的模型数量
+_COUNT_MODELS_BY_PROVIDER_STMT = select(ModelModel.provider_name, func.count()).where(
+    ModelModel.is_delete == 0
+).group_by(ModelModel.provider_name)
+
+# 基于provider_name和model_name唯一约束的模型UPSERT，以参数列表executemany批量执行
+_UPSERT_MODEL_INSERT = insert(ModelModel)
+_UPSERT_MODEL_STMT = _UPSERT_MODEL_INSERT.on_conflict_do_update(
+    index_elements=['provider_name', 'model_name'],
+    set_=dict(
+        type=_UPSERT_MODEL_INSERT.excluded.type,
+        subtype=_UPSERT_MODEL_INSERT.excluded.subtype,
+        model_metadata=_UPSERT_MODEL_INSERT.excluded.model_metadata,
+        is_delete=0,
+        updated_at=_UPSERT_MODEL_INSERT.excluded.updated_at
+    )
+)
+
 
 class ModelSyncService:
     """模型同步服务"""
@@ -29,10 +69,13 @@ class ModelSyncService:
         self.parser = ModelConfigParser(models_dir)
         self.system_user_id = system_user_id
         
-    async def sync_all_models(self) -> Dict[str, Any]:
+    async def sync_all_models(self, model_configs: Optional[List[ModelConfig]] = None) -> Dict[str, Any]:
         """
         同步所有模型配置到数据库
         
+        Args:
+            model_configs: 已解析的模型配置，未提供时扫描配置文件
+        
         Returns:
             同步结果统计
         """
@@ -44,7 +87,8 @@ class ModelSyncService:
         
         try:
             # 解析所有配置文件
-            model_configs = self.parser.scan_all_models()
+            if model_configs is None:
+                model_configs = await asyncio.to_thread(self.parser.scan_all_models_cached)
             
             async with get_async_session() as session:
                 # 直接同步模型，不再需要处理providers表
@@ -65,6 +109,7 @@ class ModelSyncService:
     async def _sync_models(self, session: AsyncSession, model_configs: List[ModelConfig]) -> Dict[str, Any]:
         """
         同步模型配置
+        所有模型以一次executemany批量UPSERT；批量失败时逐条重试以定位出错的模型
         
         Args:
             session: 数据库会话
@@ -75,36 +120,41 @@ class ModelSyncService:
         """
         result = {"synced": 0, "updated": 0, "errors": []}
         
+        # 同一(provider, model)出现多次时以最后一份配置为准（同一批UPSERT不能两次命中同一行）
+        rows: Dict[Tuple[str, str], Tuple[ModelConfig, Dict[str, Any]]] = {}
         for config in model_configs:
             try:
                 model_type, subtype = config.get_model_type_and_subtype()
-                metadata = config.to_metadata_dict()
-                
-                # 使用UPSERT操作，基于provider_name和model_name的组合
-                stmt = insert(ModelModel).values(
-                    model_name=config.model_name,
-                    type=model_type,
-                    subtype=subtype,
-                    model_metadata=json.dumps(metadata, ensure_ascii=False),
-                    is_delete=0,
-                    provider_name=config.provider
-                )
-                
-                # 如果存在则更新（基于provider_name和model_name的唯一约束）
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=['provider_name', 'model_name'],
-                    set_=dict(
-                        type=stmt.excluded.type,
-                        subtype=stmt.excluded.subtype,
-                        model_metadata=stmt.excluded.model_metadata,
-                        is_delete=0,
-                        updated_at=stmt.excluded.updated_at
-                    )
-                )
-                
-                await session.execute(stmt)
+                rows[(config.provider, config.model_name)] = (config, {
+                    "model_name": config.model_name,
+                    "type": model_type,
+                    "subtype": subtype,
+                    "model_metadata": _dumps_metadata(config.to_metadata_dict()),
+                    "is_delete": 0,
+                    "provider_name": config.provider
+                })
+            except Exception as e:
+                error_msg = f"同步模型 {config.provider}/{config.model_name} 失败: {str(e)}"
+                result["errors"].append(error_msg)
+                print(error_msg)
+        
+        if not rows:
+            return result
+        
+        try:
+            # 保存点隔离批量失败，回滚后仍可逐条重试
+            async with session.begin_nested():
+                await session.execute(_UPSERT_MODEL_STMT, [params for _, params in rows.values()])
+            result["synced"] += len(rows)
+            return result
+        except Exception as e:
+            print(f"批量同步模型失败，改为逐条同步: {str(e)}")
+        
+        for config, params in rows.values():
+            try:
+                async with session.begin_nested():
+                    await session.execute(_UPSERT_MODEL_STMT, params)
                 result["synced"] += 1
-                
             except Exception as e:
                 error_msg = f"同步模型 {config.provider}/{config.model_name} 失败: {str(e)}"
                 result["errors"].append(error_msg)
@@ -114,10 +164,13 @@ class ModelSyncService:
     
 
     
-    async def clean_deleted_models(self) -> Dict[str, Any]:
+    async def clean_deleted_models(self, model_configs: Optional[List[ModelConfig]] = None) -> Dict[str, Any]:
         """
         清理已删除的模型配置（软删除）
         
+        Args:
+            model_configs: 已解析的模型配置，未提供时扫描配置文件
+        
         Returns:
             清理结果
         """
@@ -125,29 +178,24 @@ class ModelSyncService:
         
         try:
             # 获取当前YAML文件中的所有模型
-            current_configs = self.parser.scan_all_models()
+            current_configs = (
+                await asyncio.to_thread(self.parser.scan_all_models_cached)
+                if model_configs is None else model_configs
+            )
             current_model_names = {(config.provider, config.model_name) for config in current_configs}
+            if not current_model_names:
+                # 未扫描到任何配置（如目录缺失）时不清理，避免误删全部模型
+                return result
+            providers, model_names = map(list, zip(*current_model_names))
             
             async with get_async_session() as session:
-                # 获取数据库中的所有模型
-                stmt = select(ModelModel).where(ModelModel.is_delete == 0)
-                db_models = await session.execute(stmt)
-                
-                # 找出需要删除的模型
-                models_to_delete = []
-                for model in db_models.scalars():
-                    if (model.provider_name, model.model_name) not in current_model_names:
-                        models_to_delete.append(model.id)
-                
-                # 软删除不存在的模型
-                if models_to_delete:
-                    stmt = update(ModelModel).where(
-                        ModelModel.id.in_(models_to_delete)
-                    ).values(is_delete=1)
-                    
-                    await session.execute(stmt)
-                    await session.commit()
-                    result["cleaned_models"] = len(models_to_delete)
+                # 一条UPDATE在数据库内完成比对与软删除，不再把模型行取回Python
+                deleted = await session.execute(
+                    _SOFT_DELETE_MISSING_MODELS_STMT,
+                    {'providers': providers, 'model_names': model_names}
+                )
+                await session.commit()
+                result["cleaned_models"] = deleted.rowcount
                     
         except Exception as e:
             result["errors"].append(f"清理过程中发生错误: {str(e)}")
@@ -163,7 +211,7 @@ class ModelSyncService:
         """
         try:
             # 统计YAML文件数量
-            yaml_configs = self.parser.scan_all_models()
+            yaml_configs = await asyncio.to_thread(self.parser.scan_all_models_cached)
             yaml_count = len(yaml_configs)
             yaml_by_provider = {}
             for config in yaml_configs:
@@ -171,16 +219,10 @@ class ModelSyncService:
             
             # 统计数据库中的模型数量
             async with get_async_session() as session:
-                stmt = select(ModelModel).where(ModelModel.is_delete == 0)
-                db_models = await session.execute(stmt)
-                db_models_list = list(db_models.scalars())
-                db_count = len(db_models_list)
-                
-                # 按提供商统计数据库模型
-                db_by_provider = {}
-                for model in db_models_list:
-                    provider_name = model.provider_name
-                    db_by_provider[provider_name] = db_by_provider.get(provider_name, 0) + 1
+                # 按提供商统计数据库模型（数据库内分组计数，不取回模型行）
+                db_counts = await session.execute(_COUNT_MODELS_BY_PROVIDER_STMT)
+                db_by_provider = {provider_name: count for provider_name, count in db_counts}
+                db_count = sum(db_by_provider.values())
             
             return {
                 "yaml_models_count": yaml_count,
@@ -1,3 +1,4 @@
+import asyncio
 import bcrypt
 from typing import Union
 
@@ -35,6 +36,17 @@ class PasswordService:
         
         return HashedPassword.create(hashed.decode('utf-8'))
     
+    async def hash_password_async(self, password: Union[str, Password]) -> HashedPassword:
+        """在默认线程池中加密密码（bcrypt计算期间释放GIL），供异步请求处理使用，避免阻塞事件循环
+        
+        Args:
+            password: 明文密码或密码值对象
+            
+        Returns:
+            加密后的密码值对象
+        """
+        return await asyncio.to_thread(self.hash_password, password)
+    
     def verify_password(self, password: Union[str, Password], hashed_password: HashedPassword) -> bool:
         """验证密码
         
@@ -58,6 +70,18 @@ class PasswordService:
         except (ValueError, TypeError):
             return False
     
+    async def verify_password_async(self, password: Union[str, Password], hashed_password: HashedPassword) -> bool:
+        """在默认线程池中验证密码，供异步请求处理使用
+        
+        Args:
+            password: 明文密码或密码值对象
+            hashed_password: 加密后的密码值对象
+            
+        Returns:
+            密码是否匹配
+        """
+        return await asyncio.to_thread(self.verify_password, password, hashed_password)
+    
     def is_password_strong(self, password: Union[str, Password]) -> bool:
         """检查密码强度
         
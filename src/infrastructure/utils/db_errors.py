@@ -0,0 +1,26 @@
+"""
+数据库错误解析工具
+"""
+from sqlalchemy.exc import IntegrityError
+
+
+def integrity_error_detail(error: IntegrityError) -> str:
+    """
+    提取完整性错误中违反的约束名
+    
+    str(IntegrityError) 会渲染完整的SQL语句与参数，既昂贵又会让列名误匹配；
+    这里优先读取驱动提供的结构化约束名（asyncpg异常的 constraint_name、psycopg的 diag.constraint_name），
+    取不到时退回驱动原始错误文本
+    
+    Args:
+        error: SQLAlchemy完整性错误
+        
+    Returns:
+        约束名，或驱动原始错误文本
+    """
+    orig = error.orig
+    for source in (orig, getattr(orig, '__cause__', None), getattr(orig, 'diag', None)):
+        constraint_name = getattr(source, 'constraint_name', None)
+        if constraint_name:
+            return constraint_name
+    return str(orig)
@@ -1,8 +1,22 @@
 """
 UUID生成工具
 """
-import uuid
-from typing import Optional
+import os
+import re
+from typing import List, Optional
+
+# 标准格式（8-4-4-4-12位十六进制）的UUID字符串
+_UUID_RE = re.compile(r'\A[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z')
+
+
+
+def _format_uuid4(raw: bytes) -> str:
+    """将16字节随机数设置version 4与RFC 4122变体位后格式化为标准UUID字符串（不构造uuid.UUID对象）"""
+    b = bytearray(raw)
+    b[6] = (b[6] & 0x0F) | 0x40
+    b[8] = (b[8] & 0x3F) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 
 class UUIDGenerator:
@@ -16,7 +30,24 @@ class UUIDGenerator:
         Returns:
             UUID字符串，格式如：8c9d8f16-278f-4b16-a5c0-4d1ccf348f93
         """
-        return str(uuid.uuid4())
+        return _format_uuid4(os.urandom(16))
+    
+    @staticmethod
+    def generate_batch(count: int) -> List[str]:
+        """
+        批量生成UUID字符串（一次读取所有随机字节，避免每个UUID一次系统调用）
+        
+        Args:
+            count: 需要生成的UUID数量
+            
+        Returns:
+            UUID字符串列表（version 4）
+        """
+        if count <= 0:
+            return []
+        
+        buffer = os.urandom(16 * count)
+        return [_format_uuid4(buffer[i:i + 16]) for i in range(0, 16 * count, 16)]
     
     @staticmethod
     def is_valid_uuid(uuid_string: str) -> bool:
@@ -27,13 +58,10 @@ class UUIDGenerator:
             uuid_string: 要验证的UUID字符串
             
         Returns:
-            True如果是有效的UUID，否则False
+            True如果是标准格式的UUID，否则False
         """
-        try:
-            uuid.UUID(uuid_string)
-            return True
-        except (ValueError, TypeError):
-            return False
+        # 正则匹配即可判定，不构造UUID对象，也不经过异常路径
+        return isinstance(uuid_string, str) and _UUID_RE.match(uuid_string) is not None
     
     @staticmethod
     def normalize_uuid(uuid_string: Optional[str]) -> Optional[str]:
@@ -46,17 +74,13 @@ class UUIDGenerator:
         Returns:
             标准化后的UUID字符串，如果输入无效则返回None
         """
-        if not uuid_string:
+        if not uuid_string or not isinstance(uuid_string, str):
             return None
             
-        try:
-            # 去除空格并转换为小写
-            normalized = uuid_string.strip().lower()
-            # 验证格式
-            uuid.UUID(normalized)
-            return normalized
-        except (ValueError, TypeError):
-            return None
+        # 去除空格并转换为小写
+        normalized = uuid_string.strip().lower()
+        # 验证格式
+        return normalized if _UUID_RE.match(normalized) else None
 
 
 # 全局实例
@@ -0,0 +1,34 @@
+"""测试公共夹具"""
+
+import asyncio
+import os
+
+import pytest
+
+from src.domain.model.services.llm import ModelFactory, get_model_factory
+
+try:
+    # 安装了uvloop时用libuv实现的事件循环跑测试（asyncpg与httpx均兼容）
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+
+@pytest.fixture(scope="session")
+def model_factory() -> ModelFactory:
+    """模型工厂（会话内只解析一次）"""
+    return get_model_factory()
+
+
+@pytest.fixture(scope="session")
+def deepseek_model(model_factory):
+    """DeepSeek模型实例（会话内只创建一次，API Key从环境变量 DEEPSEEK_API_KEY 读取，未设置时跳过）"""
+    api_key = os.getenv("DEEPSEEK_API_KEY")
+    if not api_key:
+        pytest.skip("未设置 DEEPSEEK_API_KEY")
+    return model_factory.create_model(
+        "deepseek",
+        api_key=api_key,
+        base_url="https://api.deepseek.com"
+    )